@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableLambda
+
+logger = logging.getLogger(__name__)
+
+
+def context_fingerprint(context, chat_history=None) -> str:
+    """답변에 영향을 주는 context 와 대화 기록의 해시를 반환합니다."""
+    payload = json.dumps([context, chat_history or []], default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    vector: np.ndarray
+    fingerprint: str
+    answer: str
+    created_at: float
+    # 답변 생성에 걸린 시간 (cache hit 시 절약한 시간)
+    latency: float
+
+
+class SemanticAnswerCache:
+    """질문 임베딩의 유사도로 이전 답변을 재사용하는 캐시.
+
+    유사도가 threshold 이상인 질문 중 검색된 context 의 fingerprint 가 같은 답변만 반환합니다.
+    항목 수는 max_size 이하로 유지하며 가장 오래 사용하지 않은 항목부터 삭제하고,
+    ttl 초가 지난 항목은 사용하지 않습니다.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        threshold: float = 0.95,
+        max_size: int = 1024,
+        ttl: Optional[float] = 3600.0,
+    ):
+        """
+        Args:
+            embedding: 질문 임베딩 모델
+            threshold: 같은 질문으로 볼 코사인 유사도 하한
+            max_size: 최대 캐시 항목 수
+            ttl: 항목 유효 시간 (초, None 이면 만료 없음)
+        """
+        self.embedding = embedding
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        # fingerprint 별 항목 id. 유사도는 context 가 같은 항목끼리만 계산합니다.
+        self._by_fingerprint: Dict[str, List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "latency_saved": self.latency_saved,
+        }
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        ids = self._by_fingerprint[entry.fingerprint]
+        ids.remove(entry_id)
+        if not ids:
+            del self._by_fingerprint[entry.fingerprint]
+
+    def _expire(self, now: float) -> None:
+        if self.ttl is None:
+            return
+        expired = [
+            entry_id
+            for entry_id, entry in self._entries.items()
+            if now - entry.created_at > self.ttl
+        ]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+    def lookup(self, vector, fingerprint: str) -> Optional[str]:
+        """질문 벡터와 fingerprint 에 맞는 캐시된 답변을 반환합니다. 없으면 None 입니다."""
+        vector = self._normalize(vector)
+        with self._lock:
+            self._expire(time.time())
+            ids = self._by_fingerprint.get(fingerprint, [])
+            if ids:
+                vectors = np.stack([self._entries[i].vector for i in ids])
+                scores = vectors @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry_id = ids[best]
+                    entry = self._entries[entry_id]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    self.latency_saved += entry.latency
+                    return entry.answer
+            self.misses += 1
+            return None
+
+    def update(self, vector, fingerprint: str, answer: str, latency: float) -> None:
+        """생성한 답변을 캐시에 추가합니다."""
+        entry = CacheEntry(
+            vector=self._normalize(vector),
+            fingerprint=fingerprint,
+            answer=answer,
+            created_at=time.time(),
+            latency=latency,
+        )
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._by_fingerprint.setdefault(fingerprint, []).append(entry_id)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_fingerprint.clear()
+
+    def wrap(self, chain: Runnable) -> Runnable:
+        """{"question", "context", "chat_history"} 를 입력으로 받는 chain 앞에 캐시를 둡니다."""
+
+        def invoke(inputs, config):
+            vector = self.embedding.embed_query(inputs["question"])
+            fingerprint = context_fingerprint(
+                inputs["context"], inputs.get("chat_history")
+            )
+            answer = self.lookup(vector, fingerprint)
+            if answer is not None:
+                return answer
+            start = time.perf_counter()
+            answer = chain.invoke(inputs, config)
+            self.update(vector, fingerprint, answer, time.perf_counter() - start)
+            return answer
+
+        async def ainvoke(inputs, config):
+            vector = await self.embedding.aembed_query(inputs["question"])
+            fingerprint = context_fingerprint(
+                inputs["context"], inputs.get("chat_history")
+            )
+            answer = self.lookup(vector, fingerprint)
+            if answer is not None:
+                return answer
+            start = time.perf_counter()
+            answer = await chain.ainvoke(inputs, config)
+            self.update(vector, fingerprint, answer, time.perf_counter() - start)
+            return answer
+
+        return RunnableLambda(invoke, afunc=ainvoke, name="SemanticAnswerCache")
@@ -0,0 +1,633 @@
+"""rag 패키지 벤치마크
+
+챕터 디렉토리에서 실행합니다.
+    python -m rag.benchmark load --workers 1 2 4 8
+    python -m rag.benchmark embed --latency 0.2 --concurrency 1 4 8
+    python -m rag.benchmark ann --vectors 200000 --index-types flat ivf hnsw ivfpq
+    python -m rag.benchmark serve --requests 64 --concurrency 8 32
+    python -m rag.benchmark cache --requests 200 --threshold 0.95
+    python -m rag.benchmark retrieval --index-types flat ivf hnsw --output result.json
+    python -m rag.benchmark registry --max-memory-mb 1 --requests 30
+    python -m rag.benchmark mmap --vectors 200000 --workers 4
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.language_models.chat_models import SimpleChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import load_prompt
+
+from rag.embedding import BatchEmbedder, HashEmbeddings, NgramHashEmbeddings
+from rag.index import (
+    index_memory_bytes,
+    load_faiss_vectorstore,
+    resolve_index_spec,
+    set_search_params,
+    train_index,
+)
+from rag.pdf import PDFRetrievalChain
+from rag.registry import RetrievalChainRegistry
+
+# 예제 PDF 디렉토리. ch3-use-cases 의 rag 패키지에는 data 가 없으므로 ch2-structures/data 를 씁니다.
+DEFAULT_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "ch2-structures",
+    "data",
+)
+
+
+def load_split_documents(source_uris):
+    """PDF 를 로드하고 PDFRetrievalChain 의 기본 설정으로 분할합니다."""
+    chain = PDFRetrievalChain(source_uris)
+    docs = chain.load_documents(source_uris)
+    return chain.split_documents(docs, chain.create_text_splitter())
+
+
+def bench_load(source_uris, workers, pages_per_task, repeat):
+    """load_workers 값에 따른 PDF 로드 시간을 비교합니다."""
+    print(f"PDF {len(source_uris)}개, CPU {os.cpu_count()}개")
+    print(f"{'workers':>8} {'time':>10} {'speedup':>8} {'pages':>6}")
+    baseline = None
+    expected = None
+    for worker_count in workers:
+        chain = PDFRetrievalChain(
+            source_uris, load_workers=worker_count, pages_per_task=pages_per_task
+        )
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            docs = chain.load_documents(source_uris)
+            best = min(best, time.perf_counter() - start)
+
+        if expected is None:
+            expected = docs
+        assert docs == expected, "로드 결과가 다릅니다."
+        baseline = baseline or best
+        print(f"{worker_count:>8} {best:>9.2f}s {baseline / best:>7.2f}x {len(docs):>6}")
+
+
+def bench_embed(source_uris, latency, batch_size, concurrency, duplicate):
+    """FAISS.from_documents 와 BatchEmbedder 의 임베딩 단계를 비교합니다.
+
+    HashEmbeddings 에 요청당 지연 시간을 주어 API 호출을 흉내 냅니다.
+    from_documents 는 모든 청크를 한 번에 넘기므로 HashEmbeddings 에서는 요청이 1번이지만,
+    OpenAIEmbeddings 는 내부에서 chunk_size 단위로 나누어 순서대로 요청합니다.
+    """
+    split_docs = load_split_documents(source_uris)
+    # 같은 문서를 여러 번 넣은 경우처럼 중복 청크를 섞습니다.
+    split_docs = split_docs * duplicate
+    texts = [doc.page_content for doc in split_docs]
+    print(f"청크 {len(texts)}개 (중복 제거 {len(set(texts))}개), 요청당 {latency}초")
+    print(f"{'mode':<24} {'time':>10} {'requests':>9}")
+
+    embedding = HashEmbeddings(latency=latency)
+    start = time.perf_counter()
+    FAISS.from_documents(split_docs, embedding=embedding)
+    elapsed = time.perf_counter() - start
+    print(f"{'from_documents':<24} {elapsed:>9.2f}s {embedding.calls:>9}")
+
+    for max_concurrency in concurrency:
+        embedding = HashEmbeddings(latency=latency)
+        embedder = BatchEmbedder(
+            embedding, batch_size=batch_size, max_concurrency=max_concurrency
+        )
+        start = time.perf_counter()
+        embedder.embed(texts)
+        elapsed = time.perf_counter() - start
+        name = f"batch={batch_size} conc={max_concurrency}"
+        print(f"{name:<24} {elapsed:>9.2f}s {embedding.calls:>9}")
+
+
+def make_clustered_vectors(n, dim, clusters, seed=0):
+    """클러스터 구조가 있는 합성 임베딩 벡터를 만듭니다."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    vectors = centers[labels] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def recall_at_k(expected, actual):
+    """정답 이웃 중 검색된 비율의 평균을 반환합니다."""
+    hits = [len(set(e) & set(a)) / len(e) for e, a in zip(expected, actual)]
+    return sum(hits) / len(hits)
+
+
+def search_latencies(index, queries, k):
+    """질의를 하나씩 검색하며 결과와 질의별 지연 시간을 반환합니다."""
+    results = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        results.append(ids[0].tolist())
+    return results, latencies
+
+
+def bench_ann(n, dim, queries, k, index_types, nprobe):
+    """인덱스 종류별 recall@k, 질의 지연 시간, 메모리 사용량을 flat 인덱스와 비교합니다."""
+    vectors = make_clustered_vectors(n + queries, dim, clusters=max(1, n // 1000))
+    data, query_vectors = vectors[:n], vectors[n:]
+    print(f"벡터 {n:,}개 x {dim}차원, 질의 {queries}개, k={k}")
+    header = f"{'index':<22} {'build':>8} {'recall':>7} {'p50':>9} {'p99':>9}"
+    print(f"{header} {'memory':>10}")
+
+    expected = None
+    for index_type in ["flat"] + [t for t in index_types if t != "flat"]:
+        spec = resolve_index_spec(index_type, dim, n)
+        start = time.perf_counter()
+        index = faiss.index_factory(dim, spec)
+        train_index(index, data)
+        index.add(data)
+        set_search_params(index, nprobe=nprobe)
+        build_time = time.perf_counter() - start
+
+        results, latencies = search_latencies(index, query_vectors, k)
+        if expected is None:
+            expected = results
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        memory = index_memory_bytes(index) / 1024 / 1024
+        print(
+            f"{spec:<22} {build_time:>7.2f}s {recall_at_k(expected, results):>7.3f} "
+            f"{p50:>7.3f}ms {p99:>7.3f}ms {memory:>7.1f}MiB"
+        )
+
+
+QUESTIONS = [
+    "각 구단은 몇 경기씩 해?",
+    "타이브레이크 경기는 어떻게 진행돼?",
+    "연장전은 몇 회까지 진행하나요?",
+    "엔트리 등록 인원은 몇 명이야?",
+    "삼성전자가 개발한 생성형 AI 의 이름은?",
+    "미국 바이든 대통령의 AI 행정명령 주요 내용은?",
+    "구글이 앤스로픽에 투자한 금액은?",
+    "영국 AI 안전성 정상회의에서 발표된 선언은?",
+]
+
+
+class LatencyChatModel(SimpleChatModel):
+    """고정된 지연 시간 후 같은 답변을 반환하는 오프라인 LLM. 벤치마크용입니다."""
+
+    latency: float = 0.5
+    response: str = "벤치마크 답변입니다."
+
+    @property
+    def _llm_type(self) -> str:
+        return "latency-chat-model"
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs) -> str:
+        time.sleep(self.latency)
+        return self.response
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        message = AIMessage(content=self.response)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class OfflinePDFRetrievalChain(PDFRetrievalChain):
+    """네트워크 없이 동작하는 PDFRetrievalChain. 임베딩과 LLM 의 지연 시간을 흉내 냅니다."""
+
+    def __init__(self, source_uri, embed_latency=0.0, llm_latency=0.0, **kwargs):
+        super().__init__(source_uri, **kwargs)
+        self.embed_latency = embed_latency
+        self.llm_latency = llm_latency
+
+    def create_embedding(self):
+        return NgramHashEmbeddings(latency=self.embed_latency)
+
+    def create_model(self):
+        return LatencyChatModel(latency=self.llm_latency)
+
+    def create_prompt(self):
+        prompt_path = os.path.join(
+            os.path.dirname(__file__), "prompts", "rag-prompt-with-chat-history.yaml"
+        )
+        return load_prompt(prompt_path, encoding="utf-8")
+
+
+def bench_serve(source_uris, requests, concurrency, embed_latency, llm_latency):
+    """고정된 임베딩, LLM 지연 시간에서 answer 와 aanswer 의 처리량을 비교합니다.
+
+    sync 는 요청마다 스레드 하나를 점유하고, async 는 하나의 이벤트 루프에서
+    max_concurrency 개까지 동시에 처리합니다.
+    """
+    chain = OfflinePDFRetrievalChain(
+        source_uris, embed_latency=embed_latency, llm_latency=llm_latency
+    ).create_chain()
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(requests)]
+    print(
+        f"요청 {requests}개, 질의 임베딩 {embed_latency}초, LLM {llm_latency}초, "
+        f"CPU {os.cpu_count()}개"
+    )
+    print(f"{'mode':<24} {'time':>10} {'req/s':>8}")
+
+    def report(name, elapsed):
+        print(f"{name:<24} {elapsed:>9.2f}s {requests / elapsed:>8.1f}")
+
+    start = time.perf_counter()
+    for question in questions:
+        chain.answer(question)
+    report("sync", time.perf_counter() - start)
+
+    for max_concurrency in concurrency:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            list(executor.map(chain.answer, questions))
+        report(f"sync threads={max_concurrency}", time.perf_counter() - start)
+
+        chain.max_concurrency = max_concurrency
+
+        async def run():
+            return await asyncio.gather(*(chain.aanswer(q) for q in questions))
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        report(f"async conc={max_concurrency}", time.perf_counter() - start)
+
+
+def question_variants(question):
+    """같은 질문을 공백, 문장 부호만 바꾸어 여러 형태로 만듭니다."""
+    base = question.rstrip("?")
+    return [question, base, f"{base} ?", f"  {question}", question.replace(" ", "  ")]
+
+
+def bench_cache(source_uris, requests, threshold, llm_latency, seed=0):
+    """비슷한 질문이 반복될 때 SemanticAnswerCache 의 hit rate 와 절약 시간을 측정합니다."""
+    rng = np.random.default_rng(seed)
+    variants = [v for question in QUESTIONS for v in question_variants(question)]
+    questions = [variants[i] for i in rng.integers(0, len(variants), requests)]
+    print(f"요청 {requests}개 (질문 형태 {len(variants)}개), LLM {llm_latency}초")
+    print(f"{'mode':<16} {'time':>9} {'hit_rate':>9} {'saved':>9}")
+
+    for use_cache in [False, True]:
+        chain = OfflinePDFRetrievalChain(
+            source_uris,
+            llm_latency=llm_latency,
+            answer_cache=use_cache,
+            answer_cache_threshold=threshold,
+        ).create_chain()
+        start = time.perf_counter()
+        for question in questions:
+            chain.answer(question)
+        elapsed = time.perf_counter() - start
+        stats = chain.answer_cache.stats if use_cache else {}
+        print(
+            f"{'cache' if use_cache else 'no cache':<16} {elapsed:>8.2f}s "
+            f"{stats.get('hit_rate', 0.0):>9.1%} {stats.get('latency_saved', 0.0):>8.2f}s"
+        )
+
+
+def peak_rss_mib():
+    """현재 프로세스의 최대 RSS 를 MiB 단위로 반환합니다."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 는 KiB, macOS 는 byte 단위입니다.
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def retrieval_worker(source_uris, index_type, k, repeat, results):
+    """인덱스 하나를 만들고 검색 지연 시간과 최대 RSS 를 측정합니다.
+
+    최대 RSS 는 프로세스 전체 값이므로 인덱스 종류마다 새 프로세스에서 측정합니다.
+    """
+    before = peak_rss_mib()
+    chain = OfflinePDFRetrievalChain(source_uris, k=k, index_type=index_type)
+    start = time.perf_counter()
+    chain.create_chain()
+    build_time = time.perf_counter() - start
+
+    retrieved = [[doc.page_content for doc in chain.retrieve(q)] for q in QUESTIONS]
+    latencies = []
+    for _ in range(repeat):
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            chain.retrieve(question)
+            latencies.append(time.perf_counter() - start)
+    peak = peak_rss_mib()
+    results.put(
+        {
+            "chunks": chain.build_progress.get("chunks"),
+            "build_time": build_time,
+            "latencies": latencies,
+            "retrieved": retrieved,
+            "peak_rss_mib": peak,
+            "rss_delta_mib": peak - before,
+            "embedding": chain.vectorstore.embedding_function.model,
+        }
+    )
+
+
+def bench_retrieval(source_uris, index_types, k, repeat, output):
+    """인덱스 종류별 생성 시간, 검색 지연 시간, 정확 검색 대비 recall@k, 최대 RSS 를 측정합니다.
+
+    결과는 실행 간 비교할 수 있도록 output 에 JSON 으로 저장합니다.
+    인덱스 종류마다 별도 프로세스에서 측정하고, rss_delta 는 모듈을 불러온 뒤부터 늘어난
+    최대 RSS 입니다.
+    """
+    print(f"PDF {len(source_uris)}개, 질의 {len(QUESTIONS)}개 x {repeat}회, k={k}")
+    print(
+        f"{'index':<8} {'build':>8} {'p50':>9} {'p95':>9} {'p99':>9} "
+        f"{'recall':>7} {'peak_rss':>10} {'rss_delta':>10}"
+    )
+    context = multiprocessing.get_context("spawn")
+    results = []
+    expected = None
+    for index_type in ["flat"] + [t for t in index_types if t != "flat"]:
+        queue = context.Queue()
+        process = context.Process(
+            target=retrieval_worker, args=(source_uris, index_type, k, repeat, queue)
+        )
+        process.start()
+        stats = queue.get()
+        process.join()
+
+        # Flat 인덱스는 정확 검색이므로 정답으로 사용합니다.
+        if expected is None:
+            expected = stats["retrieved"]
+        p50, p95, p99 = np.percentile(stats["latencies"], [50, 95, 99]) * 1000
+        result = {
+            "index_type": index_type,
+            "chunks": stats["chunks"],
+            "build_time": stats["build_time"],
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+            "recall_at_k": recall_at_k(expected, stats["retrieved"]),
+            "peak_rss_mib": stats["peak_rss_mib"],
+            "rss_delta_mib": stats["rss_delta_mib"],
+        }
+        results.append(result)
+        print(
+            f"{index_type:<8} {result['build_time']:>7.2f}s {p50:>7.3f}ms "
+            f"{p95:>7.3f}ms {p99:>7.3f}ms {result['recall_at_k']:>7.3f} "
+            f"{result['peak_rss_mib']:>7.1f}MiB {result['rss_delta_mib']:>7.1f}MiB"
+        )
+
+    if output:
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "sources": source_uris,
+            "queries": QUESTIONS,
+            "k": k,
+            "repeat": repeat,
+            "embedding": stats["embedding"],
+            "results": results,
+        }
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {output}")
+    return results
+
+
+def bench_registry(source_uris, max_memory_mb, requests, spill_dir, seed=0):
+    """여러 말뭉치를 번갈아 요청할 때 RetrievalChainRegistry 의 hit, load, evict 를 측정합니다.
+
+    PDF 하나씩, 그리고 전체 PDF 를 각각 하나의 말뭉치로 사용합니다.
+    """
+    corpora = {os.path.basename(uri): [uri] for uri in source_uris}
+    corpora["all"] = source_uris
+    registry = RetrievalChainRegistry(
+        lambda key: OfflinePDFRetrievalChain(corpora[key]),
+        max_memory_mb=max_memory_mb,
+        spill_dir=spill_dir,
+    )
+    rng = np.random.default_rng(seed)
+    keys = list(corpora)
+    latencies = []
+    for i in rng.integers(0, len(keys), requests):
+        start = time.perf_counter()
+        registry.get(keys[i]).retrieve(QUESTIONS[i % len(QUESTIONS)])
+        latencies.append(time.perf_counter() - start)
+
+    print(f"말뭉치 {len(keys)}개, 요청 {requests}개, 메모리 한도 {max_memory_mb}MiB")
+    header = f"{'corpus':<40} {'hits':>5} {'builds':>6} {'loads':>5} {'evicts':>6}"
+    print(f"{header} {'load_time':>10} {'evict_time':>10} {'memory':>9}")
+    for key, stats in registry.stats.items():
+        print(
+            f"{key:<40} {stats['hits']:>5} {stats['builds']:>6} {stats['loads']:>5} "
+            f"{stats['evictions']:>6} {stats['load_time']:>9.3f}s "
+            f"{stats['evict_time']:>9.3f}s {stats['memory_bytes'] / 1024:>6.0f}KiB"
+        )
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(
+        f"상주 메모리 {registry.memory_bytes / 1024:.0f}KiB, "
+        f"요청 p50 {p50:.1f}ms, p99 {p99:.1f}ms"
+    )
+
+
+def memory_usage():
+    """현재 프로세스의 RSS, PSS 를 MiB 단위로 반환합니다. (Linux /proc/self/smaps_rollup)
+
+    PSS 는 공유 페이지를 공유하는 프로세스 수로 나누어 계산하므로 합하면 실제 사용량이 됩니다.
+    """
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("Rss", "Pss"):
+                usage[name.lower()] = int(value.split()[0]) / 1024
+    return usage
+
+
+def mmap_worker(path, dim, mmap, barrier, results):
+    """인덱스를 불러와 검색한 뒤 모든 워커가 인덱스를 연 상태에서 메모리를 측정합니다."""
+    before = memory_usage()
+    start = time.perf_counter()
+    vectorstore = load_faiss_vectorstore(path, HashEmbeddings(dim), mmap=mmap)
+    load_time = time.perf_counter() - start
+    # Flat 인덱스 검색은 모든 벡터를 읽으므로 전체 페이지가 메모리에 올라옵니다.
+    query = np.random.default_rng(os.getpid()).standard_normal(dim).tolist()
+    vectorstore.similarity_search_by_vector(query, k=10)
+    barrier.wait()
+    after = memory_usage()
+    barrier.wait()
+    results.put(
+        {
+            "load_time": load_time,
+            "rss": after["rss"] - before["rss"],
+            "pss": after["pss"] - before["pss"],
+        }
+    )
+
+
+def bench_mmap(n, dim, workers):
+    """여러 워커 프로세스가 같은 인덱스를 복사해서 열 때와 메모리 맵으로 열 때를 비교합니다."""
+    vectors = make_clustered_vectors(n, dim, clusters=max(1, n // 1000))
+    index = faiss.IndexFlatL2(dim)
+    index.add(vectors)
+    vectorstore = FAISS(
+        embedding_function=HashEmbeddings(dim),
+        index=index,
+        docstore=InMemoryDocstore(
+            {str(i): Document(page_content=f"문서 {i}") for i in range(n)}
+        ),
+        index_to_docstore_id={i: str(i) for i in range(n)},
+    )
+    path = tempfile.mkdtemp(prefix="rag-mmap-")
+    vectorstore.save_local(path)
+    del vectorstore, index
+    size = os.path.getsize(os.path.join(path, "index.faiss")) / 1024 / 1024
+    print(f"벡터 {n:,}개 x {dim}차원, index.faiss {size:.1f}MiB, 워커 {workers}개")
+    print(f"{'mode':<6} {'load p50':>9} {'rss/worker':>11} {'pss total':>10}")
+
+    context = multiprocessing.get_context("spawn")
+    for mmap in [False, True]:
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=mmap_worker, args=(path, dim, mmap, barrier, results)
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        stats = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        load_p50 = np.median([s["load_time"] for s in stats]) * 1000
+        rss = np.mean([s["rss"] for s in stats])
+        pss = sum(s["pss"] for s in stats)
+        name = "mmap" if mmap else "copy"
+        print(f"{name:<6} {load_p50:>7.1f}ms {rss:>8.1f}MiB {pss:>7.1f}MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="rag 패키지 벤치마크")
+    subparsers = parser.add_subparsers(dest="target", required=True)
+
+    load_parser = subparsers.add_parser("load", help="PDF 병렬 로드 비교")
+    load_parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    load_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    load_parser.add_argument("--pages-per-task", type=int, default=8)
+    load_parser.add_argument("--repeat", type=int, default=1)
+
+    embed_parser = subparsers.add_parser("embed", help="임베딩 단계 비교")
+    embed_parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    embed_parser.add_argument("--latency", type=float, default=0.2)
+    embed_parser.add_argument("--batch-size", type=int, default=32)
+    embed_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    embed_parser.add_argument("--duplicate", type=int, default=2)
+
+    ann_parser = subparsers.add_parser("ann", help="FAISS 인덱스 종류 비교")
+    ann_parser.add_argument("--vectors", type=int, default=200_000)
+    ann_parser.add_argument("--dim", type=int, default=256)
+    ann_parser.add_argument("--queries", type=int, default=500)
+    ann_parser.add_argument("--k", type=int, default=10)
+    ann_parser.add_argument(
+        "--index-types", nargs="+", default=["flat", "ivf", "hnsw", "ivfpq"]
+    )
+    ann_parser.add_argument("--nprobe", type=int, default=None)
+
+    serve_parser = subparsers.add_parser("serve", help="sync, async 처리량 비교")
+    serve_parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    serve_parser.add_argument("--requests", type=int, default=64)
+    serve_parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32])
+    serve_parser.add_argument("--embed-latency", type=float, default=0.1)
+    serve_parser.add_argument("--llm-latency", type=float, default=0.5)
+
+    cache_parser = subparsers.add_parser("cache", help="답변 캐시 hit rate 측정")
+    cache_parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    cache_parser.add_argument("--requests", type=int, default=200)
+    cache_parser.add_argument("--threshold", type=float, default=0.95)
+    cache_parser.add_argument("--llm-latency", type=float, default=0.05)
+
+    retrieval_parser = subparsers.add_parser("retrieval", help="검색 지연 시간, recall 측정")
+    retrieval_parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    retrieval_parser.add_argument(
+        "--index-types", nargs="+", default=["flat", "ivf", "hnsw"]
+    )
+    retrieval_parser.add_argument("--k", type=int, default=10)
+    retrieval_parser.add_argument("--repeat", type=int, default=20)
+    retrieval_parser.add_argument("--output", default=None)
+
+    registry_parser = subparsers.add_parser("registry", help="여러 말뭉치 메모리 관리")
+    registry_parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    registry_parser.add_argument("--max-memory-mb", type=float, default=1.0)
+    registry_parser.add_argument("--requests", type=int, default=30)
+    registry_parser.add_argument("--spill-dir", default=".cache/registry")
+
+    mmap_parser = subparsers.add_parser("mmap", help="워커 프로세스 간 인덱스 메모리 공유")
+    mmap_parser.add_argument("--vectors", type=int, default=200_000)
+    mmap_parser.add_argument("--dim", type=int, default=256)
+    mmap_parser.add_argument("--workers", type=int, default=4)
+
+    args = parser.parse_args()
+    if "data_dir" in args and not glob.glob(os.path.join(args.data_dir, "*.pdf")):
+        parser.error(f"--data-dir 에 PDF 파일이 없습니다: {args.data_dir}")
+    if args.target == "load":
+        bench_load(
+            sorted(glob.glob(os.path.join(args.data_dir, "*.pdf"))),
+            args.workers,
+            args.pages_per_task,
+            args.repeat,
+        )
+    elif args.target == "embed":
+        bench_embed(
+            sorted(glob.glob(os.path.join(args.data_dir, "*.pdf"))),
+            args.latency,
+            args.batch_size,
+            args.concurrency,
+            args.duplicate,
+        )
+    elif args.target == "ann":
+        bench_ann(
+            args.vectors,
+            args.dim,
+            args.queries,
+            args.k,
+            args.index_types,
+            args.nprobe,
+        )
+    elif args.target == "serve":
+        bench_serve(
+            sorted(glob.glob(os.path.join(args.data_dir, "*.pdf"))),
+            args.requests,
+            args.concurrency,
+            args.embed_latency,
+            args.llm_latency,
+        )
+    elif args.target == "cache":
+        bench_cache(
+            sorted(glob.glob(os.path.join(args.data_dir, "*.pdf"))),
+            args.requests,
+            args.threshold,
+            args.llm_latency,
+        )
+    elif args.target == "retrieval":
+        bench_retrieval(
+            sorted(glob.glob(os.path.join(args.data_dir, "*.pdf"))),
+            args.index_types,
+            args.k,
+            args.repeat,
+            args.output,
+        )
+    elif args.target == "registry":
+        bench_registry(
+            sorted(glob.glob(os.path.join(args.data_dir, "*.pdf"))),
+            args.max_memory_mb,
+            args.requests,
+            args.spill_dir,
+        )
+    elif args.target == "mmap":
+        bench_mmap(args.vectors, args.dim, args.workers)
@@ -0,0 +1,169 @@
+import logging
+import math
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# context 의 기본 최대 토큰 수
+DEFAULT_MAX_TOKENS = 3000
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: str = "gpt-4o-mini") -> Callable[[str], int]:
+    """tiktoken 으로 model 의 토큰 수를 세는 함수를 반환합니다.
+
+    인코딩 파일을 받을 수 없는 환경에서는 UTF-8 바이트 수로 추정합니다.
+    """
+    try:
+        import tiktoken
+
+        encoding = tiktoken.encoding_for_model(model)
+    except Exception as e:
+        logger.warning(f"tiktoken 인코딩을 불러오지 못해 토큰 수를 추정합니다: {e}")
+        return lambda text: math.ceil(len(text.encode("utf-8")) / 4)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def format_document(doc: Document) -> str:
+    """문서를 <document> XML 형식으로 변환합니다."""
+    content = f"<document><content>{doc.page_content}</content>"
+    content += f"<source>{doc.metadata['source']}</source>"
+    if "page" in doc.metadata:
+        content += f"<page>{int(doc.metadata['page'])+1}</page>"
+    return content + "</document>"
+
+
+def overlap_length(left: str, right: str, min_overlap: int = 10) -> int:
+    """left 의 끝과 right 의 시작이 겹치는 길이를 반환합니다. 없으면 0 입니다."""
+    for length in range(min(len(left), len(right)), min_overlap - 1, -1):
+        if left.endswith(right[:length]):
+            return length
+    return 0
+
+
+def shingles(text: str, n: int = 3) -> set:
+    text = " ".join(text.split())
+    return {text[i : i + n] for i in range(max(1, len(text) - n + 1))}
+
+
+def similarity(left: set, right: set) -> float:
+    """두 shingle 집합의 Jaccard 유사도를 반환합니다."""
+    return len(left & right) / (len(left | right) or 1)
+
+
+class ContextPacker:
+    """검색된 문서를 토큰 예산 안에서 <document> 형식의 context 로 만듭니다.
+
+    같은 source, page 에서 겹치는 청크는 하나로 합치고, 거의 같은 청크는 순위가 낮은 쪽을
+    버린 뒤, 검색 순위대로 max_tokens 를 넘기 전까지 추가합니다.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = DEFAULT_MAX_TOKENS,
+        model: str = "gpt-4o-mini",
+        dedup_threshold: float = 0.9,
+        min_overlap: int = 10,
+    ):
+        """
+        Args:
+            max_tokens: context 의 최대 토큰 수 (None 이면 제한 없음)
+            model: 토큰 수를 셀 모델 이름
+            dedup_threshold: 중복으로 볼 3-gram Jaccard 유사도 하한
+            min_overlap: 청크를 합칠 최소 겹침 길이 (글자 수)
+        """
+        self.max_tokens = max_tokens
+        self.model = model
+        self.dedup_threshold = dedup_threshold
+        self.min_overlap = min_overlap
+        self.stats = {}
+
+    @staticmethod
+    def _location(doc: Document):
+        return doc.metadata.get("source"), doc.metadata.get("page")
+
+    def _join(self, left: Document, right: Document) -> Optional[Document]:
+        """겹치는 청크를 합친 문서를 반환합니다. 합칠 수 없으면 None 입니다."""
+        if self._location(left) != self._location(right):
+            return None
+        for first, second in [(left, right), (right, left)]:
+            length = overlap_length(
+                first.page_content, second.page_content, self.min_overlap
+            )
+            if length:
+                return Document(
+                    page_content=first.page_content + second.page_content[length:],
+                    metadata=left.metadata,
+                )
+        return None
+
+    def merge(self, docs: List[Document]) -> List[Document]:
+        """같은 source, page 에서 겹치는 청크를 합칩니다. 합친 문서는 앞 순위 자리에 둡니다."""
+        blocks = []
+        for rank, doc in enumerate(docs):
+            block = (rank, doc)
+            # 새 청크가 기존 청크 두 개를 이어 주는 경우까지 더 합칠 수 없을 때까지 반복합니다.
+            merged = True
+            while merged:
+                merged = False
+                for i, (other_rank, other) in enumerate(blocks):
+                    joined = self._join(other, block[1])
+                    if joined is not None:
+                        block = (min(other_rank, block[0]), joined)
+                        blocks.pop(i)
+                        merged = True
+                        break
+            blocks.append(block)
+        return [doc for _, doc in sorted(blocks, key=lambda block: block[0])]
+
+    def deduplicate(self, docs: List[Document]) -> List[Document]:
+        """앞 순위 문서와 거의 같은 문서를 제거합니다."""
+        kept: List[Document] = []
+        kept_shingles: List[set] = []
+        for doc in docs:
+            doc_shingles = shingles(doc.page_content)
+            if any(
+                doc.page_content in other.page_content
+                or similarity(doc_shingles, other_shingles) >= self.dedup_threshold
+                for other, other_shingles in zip(kept, kept_shingles)
+            ):
+                continue
+            kept.append(doc)
+            kept_shingles.append(doc_shingles)
+        return kept
+
+    def pack(self, docs: List[Document]) -> str:
+        """문서를 합치고 중복을 제거한 뒤 토큰 예산 안의 context 문자열을 반환합니다.
+
+        원래 format_docs 결과 대비 토큰 수는 self.stats 에 기록합니다.
+        """
+        count_tokens = get_token_counter(self.model)
+        tokens_before = count_tokens("\n".join(format_document(doc) for doc in docs))
+
+        parts = []
+        tokens = 0
+        for doc in self.deduplicate(self.merge(docs)):
+            part = format_document(doc)
+            # 구분자 "\n" 은 1 토큰으로 셉니다.
+            part_tokens = count_tokens(part) + (1 if parts else 0)
+            if self.max_tokens is not None and tokens + part_tokens > self.max_tokens:
+                break
+            parts.append(part)
+            tokens += part_tokens
+
+        context = "\n".join(parts)
+        tokens = count_tokens(context)
+        self.stats = {
+            "documents": len(docs),
+            "packed_documents": len(parts),
+            "tokens_before": tokens_before,
+            "tokens_after": tokens,
+            "tokens_saved": tokens_before - tokens,
+        }
+        logger.info(
+            f"context 토큰 {tokens_before} -> {tokens} ({tokens_before - tokens} 절약)"
+        )
+        return context
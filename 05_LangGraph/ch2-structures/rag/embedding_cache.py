@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from rag.index_cache import embedding_name
+
+logger = logging.getLogger(__name__)
+
+# SQLite 한 쿼리에 넣을 최대 파라미터 수
+SQLITE_BATCH_SIZE = 500
+
+
+class EmbeddingCache:
+    """(임베딩 모델, 텍스트 해시) 를 키로 벡터를 저장하는 SQLite 캐시.
+
+    항목 수가 max_entries 를 넘으면 가장 오래 사용하지 않은 항목부터 삭제합니다.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1_000_000):
+        """
+        Args:
+            path: SQLite 파일 경로
+            max_entries: 최대 저장 벡터 수
+        """
+        self.path = path
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_accessed_at "
+            "ON embeddings (accessed_at)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """저장된 벡터를 반환하고 사용 시각을 갱신합니다. 없는 키는 결과에 없습니다."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), SQLITE_BATCH_SIZE):
+                batch = keys[i : i + SQLITE_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                found.update(
+                    (key, np.frombuffer(vector, dtype=np.float32).tolist())
+                    for key, vector in rows
+                )
+                self._conn.execute(
+                    f"UPDATE embeddings SET accessed_at = ? WHERE key IN ({placeholders})",
+                    [now, *batch],
+                )
+            self._conn.commit()
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]) -> None:
+        """벡터를 저장하고 max_entries 를 넘는 항목을 삭제합니다."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, accessed_at) "
+                "VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in vectors.items()
+                ],
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                logger.info(f"임베딩 캐시 {count - self.max_entries}개 삭제")
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """문서 임베딩을 EmbeddingCache 에서 먼저 찾고, 없는 텍스트만 모델에 요청하는 래퍼.
+
+    질의 임베딩은 캐시하지 않습니다.
+    """
+
+    def __init__(self, underlying_embeddings: Embeddings, cache: EmbeddingCache):
+        self.underlying_embeddings = underlying_embeddings
+        self.cache = cache
+        self.model_name = embedding_name(underlying_embeddings)
+
+    def _lookup(self, texts: List[str]):
+        keys = [EmbeddingCache.make_key(self.model_name, text) for text in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+        missing = list(
+            dict.fromkeys(text for text, key in zip(texts, keys) if key not in found)
+        )
+        misses = sum(1 for key in keys if key not in found)
+        self.cache.hits += len(keys) - misses
+        self.cache.misses += misses
+        return keys, found, missing
+
+    def _store(self, keys, found, missing, vectors) -> List[List[float]]:
+        new = {
+            EmbeddingCache.make_key(self.model_name, text): vector
+            for text, vector in zip(missing, vectors)
+        }
+        if new:
+            self.cache.put_many(new)
+        found.update(new)
+        return [found[key] for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts)
+        vectors = self.underlying_embeddings.embed_documents(missing) if missing else []
+        return self._store(keys, found, missing, vectors)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts)
+        vectors = (
+            await self.underlying_embeddings.aembed_documents(missing) if missing else []
+        )
+        return self._store(keys, found, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying_embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.underlying_embeddings.aembed_query(text)
@@ -0,0 +1,183 @@
+import copy
+import math
+import os
+import pickle
+from typing import List, Optional
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+# IVF 학습에 권장되는 클러스터당 최소 학습 벡터 수
+MIN_POINTS_PER_CENTROID = 39
+# 학습에 사용할 최대 벡터 수
+MAX_TRAINING_POINTS = 100_000
+# 인덱스 벡터 데이터를 읽기 전용 메모리 맵으로 여는 플래그 (구버전 faiss 는 IO_FLAG_MMAP)
+MMAP_IO_FLAGS = (
+    getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+)
+
+
+def resolve_index_spec(index_type: str, dim: int, n: int) -> str:
+    """index_type 을 faiss.index_factory 문자열로 바꿉니다.
+
+    "flat", "ivf", "hnsw", "ivfpq" 는 벡터 수와 차원에 맞게 파라미터를 정하고,
+    그 밖의 값은 index_factory 문자열로 그대로 사용합니다.
+    """
+    nlist = max(1, min(int(4 * math.sqrt(n)), n // MIN_POINTS_PER_CENTROID))
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "ivf":
+        return f"IVF{nlist},Flat"
+    if index_type == "hnsw":
+        return "HNSW32"
+    if index_type == "ivfpq":
+        # 서브 벡터 수는 차원의 약수 중 dim / 4 이하에서 가장 큰 값 (최대 64)
+        m = max(d for d in range(1, min(64, dim // 4) + 1) if dim % d == 0)
+        # 코드북 학습에 벡터가 부족하면 코드 비트 수를 줄입니다.
+        nbits = max(1, min(8, int(math.log2(max(n // MIN_POINTS_PER_CENTROID, 2)))))
+        return f"IVF{nlist},PQ{m}x{nbits}"
+    return index_type
+
+
+def train_index(index, array: np.ndarray, seed: int = 0) -> None:
+    """학습이 필요한 인덱스를 최대 MAX_TRAINING_POINTS 개 표본으로 학습합니다."""
+    if index.is_trained:
+        return
+    if len(array) > MAX_TRAINING_POINTS:
+        rng = np.random.default_rng(seed)
+        array = array[rng.choice(len(array), MAX_TRAINING_POINTS, replace=False)]
+    index.train(array)
+
+
+def set_search_params(index, nprobe: Optional[int] = None, ef_search: int = 64):
+    """IVF 의 nprobe, HNSW 의 efSearch 검색 파라미터를 설정합니다."""
+    base = faiss.downcast_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search
+        return
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return
+    ivf.nprobe = nprobe or min(ivf.nlist, max(1, ivf.nlist // 8))
+
+
+def supports_remove(index) -> bool:
+    """FAISS vectorstore 의 delete 를 쓸 수 있는 인덱스인지 확인합니다.
+
+    HNSW 는 remove_ids 를 지원하지 않고, IVF 는 삭제 후 남은 벡터의 id 가 당겨지지 않아
+    vectorstore 의 index_to_docstore_id 와 어긋나므로 Flat 인덱스만 삭제할 수 있습니다.
+    """
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlat)
+
+
+def index_memory_bytes(index) -> int:
+    """인덱스 구조로 메모리 사용량을 계산합니다. 인덱스를 복사하지 않습니다.
+
+    벡터 코드에 IVF 는 역리스트 id, coarse quantizer, PQ 코드북을, HNSW 는 이웃 링크를 더합니다.
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        hnsw = index.hnsw
+        # neighbors, levels 는 int32, offsets 는 size_t 배열입니다.
+        links = (
+            hnsw.neighbors.size() * 4 + hnsw.levels.size() * 4 + hnsw.offsets.size() * 8
+        )
+        return index_memory_bytes(index.storage) + links
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return index.ntotal * index.sa_code_size()
+    size = ivf.ntotal * (ivf.code_size + 8) + index_memory_bytes(ivf.quantizer)
+    pq = getattr(faiss.downcast_index(ivf), "pq", None)
+    if pq is not None:
+        size += pq.centroids.size() * 4
+    return size
+
+
+def vectorstore_memory_bytes(vectorstore: FAISS) -> int:
+    """FAISS 인덱스와 docstore 의 문서 텍스트, 메타데이터 크기로 메모리 사용량을 추정합니다."""
+    docs = vectorstore.docstore._dict.values()
+    return index_memory_bytes(vectorstore.index) + sum(
+        len(doc.page_content.encode()) + len(str(doc.metadata).encode())
+        for doc in docs
+    )
+
+
+def load_faiss_vectorstore(
+    folder_path: str, embedding: Embeddings, mmap: bool = False
+) -> FAISS:
+    """FAISS.save_local 로 저장한 vectorstore 를 불러옵니다.
+
+    mmap=True 이면 인덱스를 읽기 전용 메모리 맵으로 엽니다. 같은 파일을 연 프로세스끼리
+    벡터 데이터의 물리 메모리를 공유하고, 필요한 페이지만 읽으므로 바로 열립니다.
+    """
+    if not mmap:
+        # 직접 저장한 인덱스만 불러오므로 pickle 역직렬화를 허용합니다.
+        return FAISS.load_local(
+            folder_path, embedding, allow_dangerous_deserialization=True
+        )
+    index = faiss.read_index(os.path.join(folder_path, "index.faiss"), MMAP_IO_FLAGS)
+    with open(os.path.join(folder_path, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(
+        embedding_function=embedding,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
+
+
+def writable_index(index):
+    """메모리 맵으로 연 인덱스를 메모리로 복사합니다.
+
+    메모리 맵 인덱스에 벡터를 추가하거나 삭제하면 faiss 가 프로세스를 종료하므로 먼저 복사합니다.
+    """
+    return faiss.deserialize_index(faiss.serialize_index(index))
+
+
+def copy_vectorstore(vectorstore: FAISS, mapped: bool = False) -> FAISS:
+    """인덱스, docstore, id 매핑을 복사한 vectorstore 를 반환합니다.
+
+    검색 중인 vectorstore 를 직접 수정하면 FAISS.delete, add_embeddings 가 인덱스와 id 매핑을
+    차례로 바꾸는 사이에 검색이 실패하므로, 복사본을 수정한 뒤 교체합니다.
+    mapped 이면 메모리 맵 인덱스를 메모리로 복사합니다.
+    """
+    copied = copy.copy(vectorstore)
+    if mapped:
+        copied.index = writable_index(vectorstore.index)
+    else:
+        copied.index = faiss.clone_index(vectorstore.index)
+    copied.docstore = InMemoryDocstore(dict(vectorstore.docstore._dict))
+    copied.index_to_docstore_id = dict(vectorstore.index_to_docstore_id)
+    return copied
+
+
+def build_faiss_vectorstore(
+    texts: List[str],
+    vectors: List[List[float]],
+    embedding: Embeddings,
+    metadatas: Optional[List[dict]] = None,
+    index_type: str = "flat",
+    nprobe: Optional[int] = None,
+) -> FAISS:
+    """index_type 에 맞는 FAISS 인덱스를 만들고 필요하면 학습한 뒤 벡터를 추가합니다."""
+    array = np.asarray(vectors, dtype=np.float32)
+    spec = resolve_index_spec(index_type, array.shape[1], array.shape[0])
+    index = faiss.index_factory(array.shape[1], spec)
+    train_index(index, array)
+    set_search_params(index, nprobe=nprobe)
+
+    vectorstore = FAISS(
+        embedding_function=embedding,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+    vectorstore.add_embeddings(
+        text_embeddings=list(zip(texts, vectors)), metadatas=metadatas
+    )
+    return vectorstore
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from rag.index import load_faiss_vectorstore
+
+
+def file_digest(path: str) -> str:
+    """파일 내용의 SHA-256 해시를 반환합니다."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def splitter_config(text_splitter) -> dict:
+    """분할 결과에 영향을 주는 text splitter 설정을 반환합니다."""
+    config = {"class": type(text_splitter).__name__}
+    for name, value in vars(text_splitter).items():
+        if isinstance(value, (str, int, float, bool, list, tuple)):
+            config[name] = value
+    return config
+
+
+def embedding_name(embedding: Embeddings) -> str:
+    """임베딩 모델 이름을 반환합니다."""
+    # CachedEmbeddings 처럼 다른 임베딩을 감싼 경우 원래 모델 이름을 사용합니다.
+    embedding = getattr(embedding, "underlying_embeddings", embedding)
+    model = getattr(embedding, "model", None) or getattr(embedding, "model_name", None)
+    return f"{type(embedding).__name__}:{model}"
+
+
+class FAISSIndexCache:
+    """FAISS 인덱스를 디스크에 저장하고 다시 불러오는 캐시.
+
+    캐시 키는 원본 파일 내용 해시, text splitter 설정, 임베딩 모델 이름,
+    인덱스 종류로 만듭니다.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def make_key(
+        self,
+        source_uris: List[str],
+        text_splitter,
+        embedding: Embeddings,
+        index_type: str = "flat",
+    ) -> str:
+        payload = {
+            "sources": sorted(file_digest(uri) for uri in source_uris),
+            "splitter": splitter_config(text_splitter),
+            "embedding": embedding_name(embedding),
+            "index_type": index_type,
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def load(
+        self, key: str, embedding: Embeddings, mmap: bool = False
+    ) -> Optional[FAISS]:
+        """캐시된 인덱스를 불러옵니다. 없으면 None 을 반환합니다.
+
+        mmap=True 이면 인덱스를 읽기 전용 메모리 맵으로 엽니다.
+        """
+        path = self.path(key)
+        if not os.path.isdir(path):
+            return None
+        return load_faiss_vectorstore(path, embedding, mmap=mmap)
+
+    def save(self, key: str, vectorstore: FAISS) -> None:
+        """인덱스를 임시 디렉토리에 저장한 뒤 캐시 위치로 옮깁니다."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            vectorstore.save_local(tmp_path)
+            os.replace(tmp_path, self.path(key))
+        except OSError:
+            # 다른 프로세스가 먼저 같은 키를 저장한 경우
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.isdir(self.path(key)):
+                raise
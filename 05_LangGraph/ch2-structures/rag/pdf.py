@@ -1,19 +1,80 @@
 from rag.base import RetrievalChain
 from langchain_community.document_loaders import PDFPlumberLoader
+from langchain_community.document_loaders.parsers.pdf import PDFPlumberParser
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List, Annotated
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Annotated, Tuple
+import pdfplumber
+
+
+def count_pdf_pages(source_uri: str) -> int:
+    """PDF 페이지 수를 반환합니다."""
+    with pdfplumber.open(source_uri) as pdf:
+        return len(pdf.pages)
+
+
+def load_pdf_pages(task: Tuple[str, int, int]) -> List[Document]:
+    """PDF 의 [start, end) 페이지를 PDFPlumberLoader 와 같은 형식의 Document 로 로드합니다.
+
+    프로세스 풀 워커에서 실행됩니다.
+    """
+    source_uri, start, end = task
+    parser = PDFPlumberParser()
+    with pdfplumber.open(source_uri) as pdf:
+        metadata = {
+            k: v for k, v in pdf.metadata.items() if type(v) in [str, int]
+        }
+        return [
+            Document(
+                page_content=parser._process_page_content(page) + "\n",
+                metadata={
+                    "source": source_uri,
+                    "file_path": source_uri,
+                    "page": page.page_number - 1,
+                    "total_pages": len(pdf.pages),
+                    **metadata,
+                },
+            )
+            for page in pdf.pages[start:end]
+        ]
 
 
 class PDFRetrievalChain(RetrievalChain):
-    def __init__(self, source_uri: Annotated[list, "Source URI"]):
+    def __init__(self, source_uri: Annotated[list, "Source URI"], **kwargs):
+        super().__init__(**kwargs)
         self.source_uri = source_uri
-        self.k = 10
+        # PDF 로드에 사용할 프로세스 수 (1 이면 현재 프로세스에서 순서대로 로드)
+        self.load_workers = kwargs.get("load_workers", 1)
+        # 워커 하나가 한 번에 처리할 페이지 수
+        self.pages_per_task = kwargs.get("pages_per_task", 8)
 
     def load_documents(self, source_uris: List[str]):
-        docs = []
-        for source_uri in source_uris:
-            loader = PDFPlumberLoader(source_uri)
-            docs.extend(loader.load())
+        if self.load_workers == 1:
+            docs = []
+            for source_uri in source_uris:
+                loader = PDFPlumberLoader(source_uri)
+                docs.extend(loader.load())
+
+            return docs
+
+        return self.load_documents_parallel(source_uris)
+
+    def load_documents_parallel(self, source_uris: List[str]):
+        """파일과 페이지 범위를 프로세스 풀에 나누어 로드합니다.
+
+        결과는 파일 순서, 페이지 순서대로 반환합니다.
+        """
+        with ProcessPoolExecutor(max_workers=self.load_workers) as executor:
+            page_counts = list(executor.map(count_pdf_pages, source_uris))
+            tasks = [
+                (source_uri, start, min(start + self.pages_per_task, page_count))
+                for source_uri, page_count in zip(source_uris, page_counts)
+                for start in range(0, page_count, self.pages_per_task)
+            ]
+            docs = []
+            for page_docs in executor.map(load_pdf_pages, tasks):
+                docs.extend(page_docs)
 
         return docs
 
@@ -0,0 +1,235 @@
+import copy
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_community.vectorstores import FAISS
+
+from rag.base import RetrievalChain
+from rag.index import (
+    load_faiss_vectorstore,
+    set_search_params,
+    vectorstore_memory_bytes,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalChainRegistry:
+    """말뭉치(corpus) 키별 RetrievalChain 을 필요할 때 생성하고 메모리 한도 안에서 관리합니다.
+
+    처음 요청한 키는 factory 로 chain 을 만들어 create_chain 을 호출합니다. 메모리에 올라간
+    인덱스의 합이 max_memory_mb 를 넘으면 가장 오래 사용하지 않은 인덱스를 spill_dir 에
+    저장하고 메모리에서 내린 뒤, 다시 요청할 때 디스크에서 불러옵니다. 이미 반환한 chain 은
+    내린 뒤에도 계속 사용할 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], RetrievalChain],
+        max_memory_mb: float = 1024,
+        spill_dir: str = ".cache/registry",
+    ):
+        """
+        Args:
+            factory: 키를 받아 create_chain 전의 RetrievalChain 을 반환하는 함수
+            max_memory_mb: 메모리에 유지할 인덱스 크기의 합 (MiB)
+            spill_dir: 메모리에서 내린 인덱스를 저장할 디렉토리
+        """
+        self.factory = factory
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.spill_dir = spill_dir
+        self._chains: Dict[str, RetrievalChain] = {}
+        # 메모리에 인덱스가 올라간 키 (사용 순서, 키 -> 추정 메모리 byte)
+        self._resident: "OrderedDict[str, int]" = OrderedDict()
+        # 디스크에 저장하는 중인 키 (키 -> 추정 메모리 byte)
+        self._evicting: Dict[str, int] = {}
+        self._embeddings = {}
+        self._stats: Dict[str, dict] = {}
+        # _resident, _chains 등 상태를 바꿀 때만 잡고, 생성, 로드, 저장은 키별 lock 에서 합니다.
+        self._lock = threading.RLock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._chains
+
+    @property
+    def memory_bytes(self) -> int:
+        """메모리에 올라간 인덱스 크기의 합."""
+        return sum(self._resident.values())
+
+    @property
+    def stats(self) -> Dict[str, dict]:
+        """키별 hit, build, load, evict 횟수와 누적 시간(초), 현재 메모리 크기."""
+        return {
+            key: {
+                **stats,
+                "resident": key in self._resident,
+                "memory_bytes": self._resident.get(key, 0),
+            }
+            for key, stats in self._stats.items()
+        }
+
+    def spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, hashlib.sha256(key.encode()).hexdigest())
+
+    def _record(self, key: str, event: str, elapsed: float = 0.0) -> None:
+        stats = self._stats.setdefault(
+            key,
+            {
+                "hits": 0,
+                "builds": 0,
+                "loads": 0,
+                "evictions": 0,
+                "build_time": 0.0,
+                "load_time": 0.0,
+                "evict_time": 0.0,
+            },
+        )
+        counter = "evictions" if event == "evict" else f"{event}s"
+        stats[counter] += 1
+        if event != "hit":
+            stats[f"{event}_time"] += elapsed
+
+    def _attach(self, chain: RetrievalChain, vectorstore: FAISS) -> None:
+        chain.vectorstore = vectorstore
+        chain.vector_retriever = chain.create_retriever(vectorstore)
+        chain.retriever = chain.vector_retriever
+        chain._index_mapped = chain.index_mmap
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _build(self, key: str) -> RetrievalChain:
+        start = time.perf_counter()
+        chain = self.factory(key).create_chain()
+        # background_build 로 만든 chain 도 메모리 크기를 알 수 있도록 기다립니다.
+        chain.wait_ready()
+        with self._lock:
+            self._embeddings[key] = chain.vectorstore.embedding_function
+            self._record(key, "build", time.perf_counter() - start)
+        return chain
+
+    def _load(self, key: str, spilled: RetrievalChain) -> RetrievalChain:
+        """내린 chain 을 복사하고 디스크에 저장한 인덱스를 연결합니다."""
+        start = time.perf_counter()
+        vectorstore = load_faiss_vectorstore(
+            self.spill_path(key), self._embeddings[key], mmap=spilled.index_mmap
+        )
+        # 검색 파라미터는 저장되지 않으므로 chain 설정을 다시 적용합니다.
+        set_search_params(vectorstore.index, nprobe=spilled.nprobe)
+        chain = copy.copy(spilled)
+        self._attach(chain, vectorstore)
+        with self._lock:
+            self._record(key, "load", time.perf_counter() - start)
+        return chain
+
+    def _spill(self, key: str, chain: RetrievalChain) -> None:
+        """인덱스를 디스크에 저장하고 registry 에는 인덱스를 뺀 chain 만 남깁니다.
+
+        이미 반환한 chain 은 그대로 두므로 사용 중인 쪽은 계속 검색할 수 있고,
+        메모리는 그 chain 을 더 이상 참조하지 않을 때 해제됩니다.
+        """
+        with self._key_lock(key):
+            with self._lock:
+                # 기다리는 동안 다시 요청되었거나 삭제된 경우
+                if key not in self._evicting:
+                    return
+            start = time.perf_counter()
+            path = self.spill_path(key)
+            tmp_path = f"{path}.tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            chain.vectorstore.save_local(tmp_path)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+            spilled = copy.copy(chain)
+            spilled.vectorstore = spilled.vector_retriever = spilled.retriever = None
+            with self._lock:
+                # 저장하는 동안 다시 요청되어 메모리에 남은 경우에는 그대로 둡니다.
+                if self._evicting.pop(key, None) is None:
+                    return
+                self._chains[key] = spilled
+                elapsed = time.perf_counter() - start
+                self._record(key, "evict", elapsed)
+        logger.info(f"인덱스 내림: {key} ({elapsed:.2f}초)")
+
+    def evict(self, key: str) -> None:
+        """인덱스를 디스크에 저장하고 메모리에서 내립니다."""
+        with self._lock:
+            if key not in self._resident:
+                return
+            self._evicting[key] = self._resident.pop(key)
+            chain = self._chains[key]
+        self._spill(key, chain)
+
+    def _select_victims(self, keep: str) -> List[Tuple[str, RetrievalChain]]:
+        """메모리 한도를 넘으면 오래 사용하지 않은 키부터 내릴 대상으로 표시합니다."""
+        victims = []
+        while self.memory_bytes > self.max_memory_bytes and len(self._resident) > 1:
+            lru_key = next(key for key in self._resident if key != keep)
+            self._evicting[lru_key] = self._resident.pop(lru_key)
+            victims.append((lru_key, self._chains[lru_key]))
+        if self.memory_bytes > self.max_memory_bytes:
+            logger.warning(
+                f"{keep} 인덱스 하나가 메모리 한도보다 큽니다: "
+                f"{self.memory_bytes / 1024 / 1024:.1f}MiB"
+            )
+        return victims
+
+    def _hit(
+        self, key: str
+    ) -> Tuple[Optional[RetrievalChain], List[Tuple[str, RetrievalChain]]]:
+        """메모리에 있는 chain 과 내릴 대상을 반환합니다. self._lock 안에서 호출합니다."""
+        victims = []
+        if key in self._evicting:
+            # 디스크에 저장하는 중인 인덱스는 불러오지 않고 그대로 다시 사용합니다.
+            self._resident[key] = self._evicting.pop(key)
+            victims = self._select_victims(keep=key)
+        if key not in self._resident:
+            return None, victims
+        self._resident.move_to_end(key)
+        self._record(key, "hit")
+        return self._chains[key], victims
+
+    def get(self, key: str) -> RetrievalChain:
+        """키에 해당하는 chain 을 반환합니다. 필요하면 생성하거나 디스크에서 불러옵니다.
+
+        생성과 로드는 키별 lock 안에서 진행하므로 다른 키의 요청을 막지 않습니다.
+        """
+        with self._lock:
+            chain, victims = self._hit(key)
+        if chain is None:
+            with self._key_lock(key):
+                with self._lock:
+                    chain, victims = self._hit(key)
+                    spilled = self._chains.get(key)
+                if chain is None:
+                    if spilled is None:
+                        chain = self._build(key)
+                    else:
+                        chain = self._load(key, spilled)
+                    memory = vectorstore_memory_bytes(chain.vectorstore)
+                    with self._lock:
+                        self._chains[key] = chain
+                        self._resident[key] = memory
+                        victims = self._select_victims(keep=key)
+        for victim_key, victim in victims:
+            self._spill(victim_key, victim)
+        return chain
+
+    def remove(self, key: str) -> Optional[RetrievalChain]:
+        """chain 을 registry 에서 삭제하고 디스크에 저장한 인덱스도 지웁니다."""
+        with self._key_lock(key):
+            with self._lock:
+                self._resident.pop(key, None)
+                self._evicting.pop(key, None)
+                self._embeddings.pop(key, None)
+                chain = self._chains.pop(key, None)
+            shutil.rmtree(self.spill_path(key), ignore_errors=True)
+            return chain
@@ -1,10 +1,9 @@
-def format_docs(docs):
-    return "\n".join(
-        [
-            f"<document><content>{doc.page_content}</content><source>{doc.metadata['source']}</source><page>{int(doc.metadata['page'])+1}</page></document>"
-            for doc in docs
-        ]
-    )
+from rag.context import DEFAULT_MAX_TOKENS, ContextPacker
+
+
+def format_docs(docs, max_tokens=DEFAULT_MAX_TOKENS):
+    # 겹치는 청크를 합치고 중복을 제거하여 max_tokens 안에서 context 를 만듭니다.
+    return ContextPacker(max_tokens=max_tokens).pack(docs)
 
 
 def format_searched_docs(docs):
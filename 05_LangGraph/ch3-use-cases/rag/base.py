@@ -1,11 +1,32 @@
 from langchain_core.prompts import load_prompt
 from langchain_core.output_parsers import StrOutputParser
-from langchain_community.vectorstores import FAISS
+from langchain_core.runnables import RunnableLambda
+from langchain_community.retrievers import BM25Retriever
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 
 from abc import ABC, abstractmethod
 from operator import itemgetter
 from langchain import hub
+import asyncio
+import logging
+import threading
+import time
+import weakref
+
+from rag.answer_cache import SemanticAnswerCache
+from rag.context import DEFAULT_MAX_TOKENS, ContextPacker
+from rag.embedding import BatchEmbedder, QueryEmbeddingCache
+from rag.embedding_cache import CachedEmbeddings, EmbeddingCache
+from rag.index import (
+    build_faiss_vectorstore,
+    copy_vectorstore,
+    set_search_params,
+    supports_remove,
+)
+from rag.index_cache import FAISSIndexCache
+from rag.prompt_store import PromptStore
+
+logger = logging.getLogger(__name__)
 
 
 class RetrievalChain(ABC):
@@ -13,6 +34,61 @@ class RetrievalChain(ABC):
         self.source_uri = kwargs.get("source_uri", None)
         self.k = kwargs.get("k", 10)
         self.embeddings = kwargs.get("embeddings", None)
+        # 검색 결과로 만드는 context 의 최대 토큰 수 (None 이면 제한 없음)
+        self.context_max_tokens = kwargs.get("context_max_tokens", DEFAULT_MAX_TOKENS)
+        self.context_packer = ContextPacker(max_tokens=self.context_max_tokens)
+        # FAISS 인덱스 캐시 디렉토리 (None 이면 매번 새로 생성)
+        self.index_cache_dir = kwargs.get("index_cache_dir", None)
+        self.index_cache_info = {}
+        # 캐시된 인덱스를 읽기 전용 메모리 맵으로 열지 여부 (index_cache_dir 필요)
+        self.index_mmap = kwargs.get("index_mmap", False)
+        self._index_mapped = False
+        # 임베딩 배치 크기와 동시 요청 수
+        self.embed_batch_size = kwargs.get("embed_batch_size", 256)
+        self.embed_max_concurrency = kwargs.get("embed_max_concurrency", 4)
+        # 청크 임베딩 캐시 SQLite 파일 경로와 최대 벡터 수 (None 이면 사용하지 않음)
+        self.embedding_cache_path = kwargs.get("embedding_cache_path", None)
+        self.embedding_cache_size = kwargs.get("embedding_cache_size", 1_000_000)
+        self.embedding_cache = None
+        # FAISS 인덱스 종류 ("flat", "ivf", "hnsw", "ivfpq" 또는 index_factory 문자열)
+        self.index_type = kwargs.get("index_type", "flat")
+        # IVF 인덱스 검색 시 탐색할 클러스터 수 (None 이면 자동)
+        self.nprobe = kwargs.get("nprobe", None)
+        # aretrieve, aanswer 의 이벤트 루프별 최대 동시 실행 수
+        self.max_concurrency = kwargs.get("max_concurrency", 8)
+        self._semaphores = weakref.WeakKeyDictionary()
+        # 유사한 질문의 답변을 재사용하는 캐시 (answer_cache=True 일 때 사용)
+        self.use_answer_cache = kwargs.get("answer_cache", False)
+        self.answer_cache_threshold = kwargs.get("answer_cache_threshold", 0.95)
+        self.answer_cache_size = kwargs.get("answer_cache_size", 1024)
+        self.answer_cache_ttl = kwargs.get("answer_cache_ttl", 3600.0)
+        self.answer_cache = None
+        # 검색과 답변 캐시가 함께 쓰는 임베딩 (get_embedding 참고)
+        self._embedding = None
+        # hub 프롬프트 저장 디렉토리 (None 이면 매번 hub 에서 받음)
+        self.prompt_store_dir = kwargs.get("prompt_store_dir", None)
+        # 저장된 프롬프트를 사용하면서 백그라운드에서 갱신할지 여부
+        self.prompt_refresh = kwargs.get("prompt_refresh", False)
+        # True 이면 create_chain 이 인덱스와 답변 chain(프롬프트, 모델) 생성을
+        # 백그라운드 스레드에서 진행하고 바로 반환
+        self.background_build = kwargs.get("background_build", False)
+        # 인덱스 생성 전 검색 요청의 최대 대기 시간 (초, None 이면 무제한)
+        self.build_timeout = kwargs.get("build_timeout", 30.0)
+        # 인덱스 생성 전 검색에 사용할 대체 retriever ("keyword" 또는 None)
+        self.build_fallback = kwargs.get("build_fallback", "keyword")
+        self.keyword_retriever = None
+        self.build_progress = {"stage": "pending"}
+        self._build_started = None
+        self._build_error = None
+        self._ready = threading.Event()
+        # add_sources, remove_sources 를 한 번에 하나씩 실행합니다.
+        self._update_lock = threading.Lock()
+        # keyword retriever 나 vector retriever 중 하나라도 검색에 쓸 수 있으면 설정됩니다.
+        self._retrievable = threading.Event()
+        # 백그라운드에서 만든 답변 chain 과 생성 완료 여부, 오류
+        self._answer_chain = None
+        self._chain_ready = threading.Event()
+        self._chain_error = None
 
     @abstractmethod
     def load_documents(self, source_uris):
@@ -31,10 +107,196 @@ class RetrievalChain(ABC):
     def create_embedding(self):
         return OpenAIEmbeddings(model="text-embedding-3-small")
 
+    def get_embedding(self):
+        """vectorstore 와 답변 캐시가 함께 쓰는 임베딩을 반환합니다.
+
+        answer, aanswer 는 요청마다 질의 벡터를 기억하므로, 검색한 질문으로 답변 캐시를
+        조회할 때 다시 임베딩하지 않습니다.
+        """
+        if self._embedding is None:
+            self._embedding = QueryEmbeddingCache(self.create_embedding())
+        return self._embedding
+
+    def create_embedder(self, embedding):
+        if self.embedding_cache_path:
+            if self.embedding_cache is None:
+                self.embedding_cache = EmbeddingCache(
+                    self.embedding_cache_path, max_entries=self.embedding_cache_size
+                )
+            embedding = CachedEmbeddings(embedding, self.embedding_cache)
+        return BatchEmbedder(
+            embedding,
+            batch_size=self.embed_batch_size,
+            max_concurrency=self.embed_max_concurrency,
+        )
+
     def create_vectorstore(self, split_docs):
-        return FAISS.from_documents(
-            documents=split_docs, embedding=self.create_embedding()
+        embedding = self.get_embedding()
+        texts = [doc.page_content for doc in split_docs]
+        vectors = self.create_embedder(embedding).embed(texts)
+        return build_faiss_vectorstore(
+            texts,
+            vectors,
+            embedding,
+            metadatas=[doc.metadata for doc in split_docs],
+            index_type=self.index_type,
+            nprobe=self.nprobe,
+        )
+
+    def get_source_uris(self):
+        """source_uri 를 파일 경로 목록으로 반환합니다."""
+        if isinstance(self.source_uri, str):
+            return [self.source_uri]
+        return list(self.source_uri or [])
+
+    def update_progress(self, stage, **info):
+        """인덱스 생성 진행 상태를 기록합니다."""
+        elapsed = time.perf_counter() - (self._build_started or time.perf_counter())
+        self.build_progress = {
+            **self.build_progress,
+            **info,
+            "stage": stage,
+            "elapsed": elapsed,
+        }
+
+    def create_keyword_retriever(self, split_docs):
+        """인덱스 생성 전에 사용할 키워드(BM25) retriever 를 생성합니다."""
+        return BM25Retriever.from_documents(split_docs, k=self.k)
+
+    def create_vectorstore_from_source(self, text_splitter):
+        """문서를 로드, 분할, 임베딩하여 vectorstore 를 생성합니다."""
+        self.update_progress("loading")
+        docs = self.load_documents(self.source_uri)
+        self.update_progress("splitting", documents=len(docs))
+        split_docs = self.split_documents(docs, text_splitter)
+        if self.background_build and self.build_fallback == "keyword":
+            self.keyword_retriever = self.create_keyword_retriever(split_docs)
+            self._retrievable.set()
+        self.update_progress("embedding", chunks=len(split_docs))
+        return self.create_vectorstore(split_docs)
+
+    def build_vectorstore(self, text_splitter):
+        """문서를 로드, 분할, 임베딩하여 vectorstore 를 생성합니다.
+
+        index_cache_dir 가 설정되어 있으면 원본 파일 내용, 분할 설정, 임베딩 모델이
+        같은 인덱스를 디스크에서 불러오고, 없으면 새로 만들어 저장합니다.
+        """
+        start = time.perf_counter()
+        if not self.index_cache_dir:
+            if self.index_mmap:
+                raise ValueError("index_mmap 을 사용하려면 index_cache_dir 가 필요합니다.")
+            return self.create_vectorstore_from_source(text_splitter)
+
+        cache = FAISSIndexCache(self.index_cache_dir)
+        embedding = self.get_embedding()
+        key = cache.make_key(
+            self.get_source_uris(), text_splitter, embedding, self.index_type
+        )
+        self.update_progress("loading_cache")
+        vectorstore = cache.load(key, embedding, mmap=self.index_mmap)
+        hit = vectorstore is not None
+        if not hit:
+            vectorstore = self.create_vectorstore_from_source(text_splitter)
+            cache.save(key, vectorstore)
+            if self.index_mmap:
+                # 다른 프로세스와 메모리를 공유하도록 저장한 파일을 메모리 맵으로 다시 엽니다.
+                vectorstore = cache.load(key, embedding, mmap=True)
+        # 검색 파라미터는 캐시 키에 없으므로 불러온 인덱스에 현재 설정을 적용합니다.
+        set_search_params(vectorstore.index, nprobe=self.nprobe)
+        self._index_mapped = self.index_mmap
+
+        self.index_cache_info = {
+            "key": key,
+            "hit": hit,
+            "elapsed": time.perf_counter() - start,
+        }
+        logger.info(
+            f"FAISS 인덱스 캐시 {'hit' if hit else 'miss'}: "
+            f"{'로드' if hit else '재생성'} {self.index_cache_info['elapsed']:.2f}초"
+        )
+        return vectorstore
+
+    def save_index_cache(self):
+        """현재 vectorstore 를 현재 source 목록에 해당하는 캐시 키로 저장합니다."""
+        if not self.index_cache_dir:
+            return
+        cache = FAISSIndexCache(self.index_cache_dir)
+        key = cache.make_key(
+            self.get_source_uris(),
+            self.create_text_splitter(),
+            self.vectorstore.embedding_function,
+            self.index_type,
         )
+        cache.save(key, self.vectorstore)
+        self.index_cache_info = {**self.index_cache_info, "key": key}
+
+    def _delete_chunks(self, vectorstore, source_uris):
+        """source 가 source_uris 에 속하는 청크를 vectorstore 의 인덱스와 docstore 에서 삭제합니다."""
+        source_uris = set(source_uris)
+        ids = [
+            doc_id
+            for doc_id in vectorstore.index_to_docstore_id.values()
+            if vectorstore.docstore.search(doc_id).metadata.get("source") in source_uris
+        ]
+        if ids:
+            if not supports_remove(vectorstore.index):
+                raise ValueError(
+                    f"{self.index_type} 인덱스는 삭제를 지원하지 않습니다. "
+                    "create_chain 으로 인덱스를 다시 만들어야 합니다."
+                )
+            vectorstore.delete(ids)
+        return ids
+
+    def _swap_vectorstore(self, vectorstore, source_uris):
+        """수정한 복사본으로 vectorstore 와 retriever 를 교체합니다.
+
+        이미 시작한 검색은 이전 vectorstore 로 끝까지 진행합니다.
+        """
+        vector_retriever = self.create_retriever(vectorstore)
+        replace_retriever = getattr(self, "retriever", None) is self.vector_retriever
+        self.vectorstore = vectorstore
+        self.vector_retriever = vector_retriever
+        if replace_retriever:
+            self.retriever = vector_retriever
+        self._index_mapped = False
+        self.source_uri = source_uris
+
+    def add_sources(self, source_uris):
+        """만들어진 인덱스에 문서를 추가합니다. 새 문서의 청크만 임베딩합니다.
+
+        이미 있는 문서를 다시 추가하면 기존 청크를 지우고 새로 추가합니다.
+        인덱스 복사본을 수정한 뒤 교체하므로 그동안에도 검색할 수 있습니다.
+        """
+        self.wait_ready()
+        docs = self.load_documents(source_uris)
+        split_docs = self.split_documents(docs, self.create_text_splitter())
+        texts = [doc.page_content for doc in split_docs]
+        # 임베딩을 먼저 끝내고 인덱스에는 한 번에 추가합니다.
+        vectors = self.create_embedder(self.vectorstore.embedding_function).embed(
+            texts
+        )
+        with self._update_lock:
+            vectorstore = copy_vectorstore(self.vectorstore, mapped=self._index_mapped)
+            self._delete_chunks(vectorstore, source_uris)
+            ids = vectorstore.add_embeddings(
+                text_embeddings=list(zip(texts, vectors)),
+                metadatas=[doc.metadata for doc in split_docs],
+            )
+            remaining = [uri for uri in self.get_source_uris() if uri not in source_uris]
+            self._swap_vectorstore(vectorstore, remaining + list(source_uris))
+            self.save_index_cache()
+        return ids
+
+    def remove_sources(self, source_uris):
+        """인덱스와 docstore 에서 문서의 청크를 삭제합니다."""
+        self.wait_ready()
+        with self._update_lock:
+            vectorstore = copy_vectorstore(self.vectorstore, mapped=self._index_mapped)
+            ids = self._delete_chunks(vectorstore, source_uris)
+            remaining = [uri for uri in self.get_source_uris() if uri not in source_uris]
+            self._swap_vectorstore(vectorstore, remaining)
+            self.save_index_cache()
+        return ids
 
     def create_retriever(self, vectorstore):
         # MMR을 사용하여 검색을 수행하는 retriever를 생성합니다.
@@ -47,21 +309,93 @@ class RetrievalChain(ABC):
         return ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
 
     def create_prompt(self):
-        return hub.pull("teddynote/rag-prompt-chat-history")
+        name = "teddynote/rag-prompt-chat-history"
+        if not self.prompt_store_dir:
+            return hub.pull(name)
+        return PromptStore(self.prompt_store_dir, refresh=self.prompt_refresh).get(name)
 
-    @staticmethod
-    def format_docs(docs):
-        return "\n".join(docs)
+    def format_docs(self, docs):
+        """검색된 문서를 토큰 예산 안의 context 로 만듭니다.
 
-    def create_chain(self):
-        docs = self.load_documents(self.source_uri)
-        text_splitter = self.create_text_splitter()
-        split_docs = self.split_documents(docs, text_splitter)
-        self.vectorstore = self.create_vectorstore(split_docs)
-        self.retriever = self.create_retriever(self.vectorstore)
+        줄어든 토큰 수는 context_packer.stats 에 기록합니다.
+        """
+        return self.context_packer.pack(docs)
+
+    def build_index(self, text_splitter):
+        """vectorstore 와 retriever 를 생성하고 준비 완료 상태로 바꿉니다."""
+        try:
+            vectorstore = self.build_vectorstore(text_splitter)
+            self.vector_retriever = self.create_retriever(vectorstore)
+            self.vectorstore = vectorstore
+        except Exception as e:
+            self._build_error = e
+            self.update_progress("failed", error=repr(e))
+            self._ready.set()
+            self._retrievable.set()
+            raise
+        self.update_progress("ready")
+        self._ready.set()
+        self._retrievable.set()
+
+    def _build_index_in_background(self, text_splitter):
+        try:
+            self.build_index(text_splitter)
+        except Exception:
+            logger.exception("백그라운드 인덱스 생성 실패")
+
+    @property
+    def ready(self):
+        """인덱스 생성이 끝났는지 여부."""
+        return self._ready.is_set() and self._build_error is None
+
+    def wait_ready(self, timeout=None):
+        """인덱스 생성이 끝날 때까지 최대 timeout 초 기다립니다.
+
+        생성에 실패했으면 예외를 다시 발생시키고, 시간 안에 끝나지 않으면 TimeoutError 를 발생시킵니다.
+        create_chain 을 호출하기 전이면 기다리지 않고 RuntimeError 를 발생시킵니다.
+        """
+        if self._build_started is None:
+            raise RuntimeError(
+                "인덱스를 아직 생성하지 않았습니다. create_chain 을 먼저 호출하세요."
+            )
+        self._wait(self._ready, timeout)
+        if self._build_error is not None:
+            raise RuntimeError("인덱스 생성에 실패했습니다.") from self._build_error
+
+    def _wait(self, event, timeout):
+        if not event.wait(timeout):
+            raise TimeoutError(
+                f"{timeout}초 안에 인덱스 생성이 끝나지 않았습니다. "
+                f"진행 상태: {self.build_progress}"
+            )
+
+    def get_retriever(self, timeout=None):
+        """검색에 사용할 retriever 를 반환합니다.
+
+        인덱스가 준비되었으면 vector retriever, 아직 생성 중이면 keyword retriever 를 반환하고,
+        둘 다 없으면 둘 중 하나가 준비될 때까지 최대 timeout 초 기다립니다.
+        """
+        self._wait(self._retrievable, timeout)
+        if self._ready.is_set():
+            self.wait_ready(0)
+            return self.vector_retriever
+        return self.keyword_retriever
+
+    def _lazy_retrieve(self, question, config):
+        return self.get_retriever(self.build_timeout).invoke(question, config)
+
+    async def _alazy_retrieve(self, question, config):
+        if self._retrievable.is_set():
+            retriever = self.get_retriever(0)
+        else:
+            retriever = await asyncio.to_thread(self.get_retriever, self.build_timeout)
+        return await retriever.ainvoke(question, config)
+
+    def build_answer_chain(self):
+        """프롬프트와 모델로 {"question", "context", "chat_history"} 를 받는 답변 chain 을 만듭니다."""
         model = self.create_model()
         prompt = self.create_prompt()
-        self.chain = (
+        chain = (
             {
                 "question": itemgetter("question"),
                 "context": itemgetter("context"),
@@ -71,4 +405,129 @@ class RetrievalChain(ABC):
             | model
             | StrOutputParser()
         )
+        if self.use_answer_cache:
+            self.answer_cache = self.create_answer_cache(self.get_embedding())
+            chain = self.answer_cache.wrap(chain)
+        return chain
+
+    def _build_answer_chain_in_background(self):
+        try:
+            self._answer_chain = self.build_answer_chain()
+        except Exception as e:
+            self._chain_error = e
+            logger.exception("백그라운드 답변 chain 생성 실패")
+        finally:
+            self._chain_ready.set()
+
+    def get_answer_chain(self, timeout=None):
+        """답변 chain 을 반환합니다. 백그라운드에서 생성 중이면 최대 timeout 초 기다립니다."""
+        if not self._chain_ready.wait(timeout):
+            raise TimeoutError(
+                f"{timeout}초 안에 답변 chain(프롬프트, 모델) 생성이 끝나지 않았습니다."
+            )
+        if self._chain_error is not None:
+            raise RuntimeError("답변 chain 생성에 실패했습니다.") from self._chain_error
+        return self._answer_chain
+
+    def _lazy_answer(self, inputs, config):
+        return self.get_answer_chain(self.build_timeout).invoke(inputs, config)
+
+    async def _alazy_answer(self, inputs, config):
+        if self._chain_ready.is_set():
+            chain = self.get_answer_chain(0)
+        else:
+            chain = await asyncio.to_thread(self.get_answer_chain, self.build_timeout)
+        return await chain.ainvoke(inputs, config)
+
+    def create_chain(self):
+        text_splitter = self.create_text_splitter()
+        self._ready.clear()
+        self._retrievable.clear()
+        self._build_error = None
+        self._build_started = time.perf_counter()
+        self.build_progress = {"stage": "pending"}
+        if self.background_build:
+            # 인덱스가 준비되기 전 검색은 keyword retriever 를 쓰거나 준비될 때까지 기다립니다.
+            self.retriever = RunnableLambda(
+                self._lazy_retrieve, afunc=self._alazy_retrieve, name="LazyRetriever"
+            )
+            threading.Thread(
+                target=self._build_index_in_background,
+                args=(text_splitter,),
+                daemon=True,
+            ).start()
+            # 프롬프트(hub.pull)와 모델 생성도 기다리지 않고, 답변 요청이 준비될 때까지 기다립니다.
+            self._answer_chain = None
+            self._chain_error = None
+            self._chain_ready.clear()
+            self.chain = RunnableLambda(
+                self._lazy_answer, afunc=self._alazy_answer, name="LazyAnswerChain"
+            )
+            threading.Thread(
+                target=self._build_answer_chain_in_background, daemon=True
+            ).start()
+        else:
+            self.build_index(text_splitter)
+            self.retriever = self.vector_retriever
+            self._answer_chain = self.chain = self.build_answer_chain()
+            self._chain_ready.set()
         return self
+
+    def create_answer_cache(self, embedding):
+        return SemanticAnswerCache(
+            embedding,
+            threshold=self.answer_cache_threshold,
+            max_size=self.answer_cache_size,
+            ttl=self.answer_cache_ttl,
+        )
+
+    async def acreate_chain(self):
+        """create_chain 의 비동기 버전입니다.
+
+        문서 로드와 인덱스 생성은 별도 스레드에서 실행하여 이벤트 루프를 막지 않습니다.
+        """
+        return await asyncio.to_thread(self.create_chain)
+
+    def _get_semaphore(self):
+        """현재 이벤트 루프에서 동시 실행 수를 제한할 semaphore 를 반환합니다."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    def make_chain_input(self, question, docs, chat_history=None):
+        return {
+            "question": question,
+            "context": self.format_docs(docs),
+            "chat_history": chat_history or [],
+        }
+
+    def retrieve(self, question):
+        """질문과 관련된 문서를 검색합니다."""
+        return self.retriever.invoke(question)
+
+    async def aretrieve(self, question):
+        """retrieve 의 비동기 버전입니다."""
+        async with self._get_semaphore():
+            return await self.retriever.ainvoke(question)
+
+    def answer(self, question, chat_history=None):
+        """문서를 검색하고 검색 결과를 context 로 답변을 생성합니다."""
+        with self.get_embedding().request():
+            docs = self.retrieve(question)
+            return self.chain.invoke(
+                self.make_chain_input(question, docs, chat_history)
+            )
+
+    async def aanswer(self, question, chat_history=None):
+        """answer 의 비동기 버전입니다.
+
+        여러 질문을 asyncio.gather 로 실행하면 하나의 이벤트 루프에서 임베딩, LLM 요청을
+        max_concurrency 개까지 동시에 처리합니다.
+        """
+        async with self._get_semaphore():
+            with self.get_embedding().request():
+                docs = await self.retriever.ainvoke(question)
+                return await self.chain.ainvoke(
+                    self.make_chain_input(question, docs, chat_history)
+                )
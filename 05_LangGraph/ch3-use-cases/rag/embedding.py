@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def run_sync(coro):
+    """코루틴을 동기적으로 실행합니다.
+
+    Jupyter 처럼 이미 이벤트 루프가 실행 중이면 별도 스레드에서 실행합니다.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """API 요청 한도 초과(429) 오류인지 확인합니다."""
+    return (
+        type(error).__name__ == "RateLimitError"
+        or getattr(error, "status_code", None) == 429
+    )
+
+
+class HashEmbeddings(Embeddings):
+    """텍스트 해시로 벡터를 만드는 결정적 임베딩. 오프라인 테스트, 벤치마크용입니다.
+
+    latency 를 지정하면 API 호출처럼 요청마다 지연 시간을 둡니다.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+        self.model = f"hash-{size}"
+        self.calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.size)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class NgramHashEmbeddings(HashEmbeddings):
+    """문자 n-gram 을 해시하여 더한 결정적 임베딩. 오프라인 테스트, 벤치마크용입니다.
+
+    HashEmbeddings 와 달리 글자가 비슷한 텍스트는 비슷한 벡터가 됩니다.
+    """
+
+    def __init__(self, size: int = 256, n: int = 2, latency: float = 0.0):
+        super().__init__(size=size, latency=latency)
+        self.n = n
+        self.model = f"ngram{n}-hash-{size}"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size)
+        text = " ".join(text.split())
+        for i in range(max(1, len(text) - self.n + 1)):
+            digest = hashlib.md5(text[i : i + self.n].encode()).digest()
+            index = int.from_bytes(digest[:4], "little") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+
+class QueryEmbeddingCache(Embeddings):
+    """한 요청 안에서 질의 임베딩을 재사용하는 래퍼.
+
+    request() 블록 안에서는 검색할 때 만든 질의 벡터를 답변 캐시 조회에서 다시 쓰고,
+    블록 밖이나 문서 임베딩은 그대로 전달합니다. 요청별 저장소는 ContextVar 로 두므로
+    다른 스레드나 asyncio task 의 요청과 섞이지 않습니다.
+    """
+
+    def __init__(self, underlying_embeddings: Embeddings):
+        self.underlying_embeddings = underlying_embeddings
+        self.model = getattr(underlying_embeddings, "model", None) or getattr(
+            underlying_embeddings, "model_name", None
+        )
+        # 현재 요청의 질의 텍스트 -> 벡터 (request() 밖에서는 None)
+        self._request: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar(
+            f"query_embeddings_{id(self)}", default=None
+        )
+
+    @contextmanager
+    def request(self):
+        """블록 안의 같은 질의는 한 번만 임베딩합니다."""
+        token = self._request.set({})
+        try:
+            yield
+        finally:
+            self._request.reset(token)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.underlying_embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.underlying_embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vectors = self._request.get()
+        if vectors is None:
+            return self.underlying_embeddings.embed_query(text)
+        if text not in vectors:
+            vectors[text] = self.underlying_embeddings.embed_query(text)
+        return vectors[text]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vectors = self._request.get()
+        if vectors is None:
+            return await self.underlying_embeddings.aembed_query(text)
+        if text not in vectors:
+            vectors[text] = await self.underlying_embeddings.aembed_query(text)
+        return vectors[text]
+
+
+class BatchEmbedder:
+    """텍스트를 배치로 나누어 동시 요청 수를 제한하며 비동기로 임베딩합니다.
+
+    같은 텍스트는 한 번만 요청하고, 요청 한도 초과 오류는 대기 후 재시도합니다.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        batch_size: int = 256,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        delay: float = 1.0,
+        backoff: float = 2.0,
+    ):
+        """
+        Args:
+            embedding: 임베딩 모델
+            batch_size: 한 번에 요청할 텍스트 수
+            max_concurrency: 동시에 보낼 최대 요청 수
+            max_retries: 요청 한도 초과 시 최대 재시도 횟수
+            delay: 첫 재시도 대기 시간 (초)
+            backoff: 재시도 간 대기 시간 증가 배수
+        """
+        self.embedding = embedding
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.delay = delay
+        self.backoff = backoff
+        self.stats = {}
+
+    async def _embed_batch(
+        self, batch: List[str], semaphore: asyncio.Semaphore
+    ) -> List[List[float]]:
+        retries = 0
+        current_delay = self.delay
+        while True:
+            async with semaphore:
+                try:
+                    return await self.embedding.aembed_documents(batch)
+                except Exception as e:
+                    if not is_rate_limit_error(e) or retries >= self.max_retries:
+                        raise
+            retries += 1
+            logger.warning(
+                f"임베딩 요청 한도 초과, 재시도 {retries}/{self.max_retries} - "
+                f"{current_delay}초 후 재시도"
+            )
+            await asyncio.sleep(current_delay)
+            current_delay *= self.backoff
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """텍스트 목록을 임베딩합니다. 결과는 입력 순서와 같습니다."""
+        start = time.perf_counter()
+        # 중복을 제거한 텍스트 목록 (처음 나온 순서 유지)
+        unique: Dict[str, int] = {}
+        for text in texts:
+            unique.setdefault(text, len(unique))
+        unique_texts = list(unique)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        batches = [
+            unique_texts[i : i + self.batch_size]
+            for i in range(0, len(unique_texts), self.batch_size)
+        ]
+        results = await asyncio.gather(
+            *(self._embed_batch(batch, semaphore) for batch in batches)
+        )
+        vectors = [vector for batch_vectors in results for vector in batch_vectors]
+
+        self.stats = {
+            "texts": len(texts),
+            "unique_texts": len(unique_texts),
+            "requests": len(batches),
+            "elapsed": time.perf_counter() - start,
+        }
+        return [vectors[unique[text]] for text in texts]
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """aembed 의 동기 버전입니다."""
+        return run_sync(self.aembed(texts))
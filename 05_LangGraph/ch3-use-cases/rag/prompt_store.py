@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+from langchain import hub
+from langchain_core.load import dumpd, load
+
+logger = logging.getLogger(__name__)
+
+# 저장 형식이 바뀌면 올립니다. 다른 버전으로 저장된 프롬프트는 다시 받습니다.
+PROMPT_STORE_VERSION = 1
+
+
+def prompt_version(prompt) -> Optional[str]:
+    """hub 에서 받은 프롬프트의 commit hash 를 반환합니다."""
+    return (getattr(prompt, "metadata", None) or {}).get("lc_hub_commit_hash")
+
+
+class PromptStore:
+    """hub 프롬프트를 디스크에 저장하고 디스크에서 먼저 불러오는 저장소.
+
+    저장된 프롬프트가 있으면 네트워크 없이 반환합니다. refresh=True 이면 반환 후
+    백그라운드 스레드에서 hub 의 최신 프롬프트를 받아 저장하며, 다음 호출부터 사용합니다.
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        refresh: bool = False,
+        pull: Optional[Callable] = None,
+    ):
+        """
+        Args:
+            store_dir: 프롬프트를 저장할 디렉토리
+            refresh: 저장된 프롬프트를 반환한 뒤 백그라운드에서 갱신할지 여부
+            pull: 프롬프트를 받아 오는 함수 (기본값 hub.pull)
+        """
+        self.store_dir = store_dir
+        self.refresh = refresh
+        self._pull = pull or hub.pull
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.store_dir, name.replace("/", "__") + ".json")
+
+    def load(self, name: str):
+        """저장된 프롬프트를 불러옵니다. 없거나 저장 형식이 다르면 None 을 반환합니다."""
+        path = self.path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("store_version") != PROMPT_STORE_VERSION:
+            return None
+        return load(data["prompt"])
+
+    def save(self, name: str, prompt) -> None:
+        """프롬프트를 version 정보와 함께 저장합니다."""
+        os.makedirs(self.store_dir, exist_ok=True)
+        data = {
+            "store_version": PROMPT_STORE_VERSION,
+            "name": name,
+            "version": prompt_version(prompt),
+            "pulled_at": time.time(),
+            "prompt": dumpd(prompt),
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path(name))
+
+    def pull(self, name: str):
+        """hub 에서 프롬프트를 받아 저장합니다."""
+        prompt = self._pull(name)
+        self.save(name, prompt)
+        logger.info(f"프롬프트 저장: {name} (version {prompt_version(prompt)})")
+        return prompt
+
+    def _refresh(self, name: str) -> None:
+        try:
+            self.pull(name)
+        except Exception as e:
+            logger.warning(f"프롬프트 갱신 실패: {name} - {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+    def refresh_in_background(self, name: str) -> Optional[threading.Thread]:
+        """백그라운드 스레드에서 프롬프트를 갱신합니다. 이미 갱신 중이면 None 을 반환합니다."""
+        with self._lock:
+            if name in self._refreshing:
+                return None
+            self._refreshing.add(name)
+        thread = threading.Thread(target=self._refresh, args=(name,), daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, name: str):
+        """저장된 프롬프트를 반환하고, 없으면 hub 에서 받아 저장합니다."""
+        prompt = self.load(name)
+        if prompt is None:
+            return self.pull(name)
+        if self.refresh:
+            self.refresh_in_background(name)
+        return prompt
@@ -4,12 +4,10 @@ import sys
 import streamlit as st
 from dotenv import load_dotenv
 from elasticsearch import Elasticsearch
-from langchain.retrievers import EnsembleRetriever
 from langchain_core.messages import ChatMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
-from langchain_elasticsearch import ElasticsearchStore
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 
@@ -22,8 +20,8 @@ def load_path():
 
 load_path()
 
-from share.langchain.retriever.custom_elastic_search_bm25 import (
-    CustomElasticSearchBM25Retriever,
+from share.langchain.retriever.custom_elastic_search_hybrid import (
+    CustomElasticSearchHybridRetriever,
 )
 
 load_dotenv()
@@ -79,21 +77,16 @@ def format_docs(docs):
 
 
 embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-vector_store = ElasticsearchStore(
-    es_url="http://172.16.120.203:9201",
-    index_name="kmhan_pdf",
-    embedding=embeddings,
-)
-vector_retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-
 elasticsearch_client = Elasticsearch(hosts=["http://172.16.120.203:9201"])
-bm25_retriever = CustomElasticSearchBM25Retriever(
-    client=elasticsearch_client, index_name="kmhan_pdf", k=3
-)
 
-retriever = EnsembleRetriever(
-    retrievers=[bm25_retriever, vector_retriever],
-    weights=[0.5, 0.5],
+# BM25 와 벡터 검색을 요청 한 번으로 보내고 Elasticsearch 에서 RRF 로 합칩니다.
+# rrf 를 지원하지 않는 노드(8.14 미만, 라이선스)에서는 자동으로 weighted 로 검색합니다.
+# 기존 EnsembleRetriever(각 3개의 합집합, 최대 6개)와 같은 context 크기가 되도록 6개를 받습니다.
+retriever = CustomElasticSearchHybridRetriever(
+    client=elasticsearch_client,
+    index_name="kmhan_pdf",
+    embedding=embeddings,
+    k=6,
 )
 
 
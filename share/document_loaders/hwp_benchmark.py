@@ -0,0 +1,215 @@
+"""HWP 로더 마이크로 벤치마크
+
+실행 예:
+    python -m share.document_loaders.hwp_benchmark records --paragraphs 200000
+    python -m share.document_loaders.hwp_benchmark normalize --megabytes 8
+    python -m share.document_loaders.hwp_benchmark hwpx --paragraphs 200000
+"""
+
+import argparse
+import io
+import struct
+import time
+import tracemalloc
+import zipfile
+import zlib
+from typing import Any, Callable
+from xml.sax.saxutils import escape
+
+from share.document_loaders.hwp import (
+    HWPLoader,
+    HWPTextNormalizer,
+    iter_hwp_records,
+)
+from share.document_loaders.hwpx import (
+    HWPX_MIMETYPE,
+    HWPX_PARAGRAPH_NS,
+    iter_hwpx_paragraphs,
+)
+
+HWPTAG_PARA_HEADER = 66
+HWPTAG_PARA_TEXT = 67
+HWPTAG_PARA_CHAR_SHAPE = 68
+HWPTAG_PARA_LINE_SEG = 69
+
+
+def _record(tag: int, payload: bytes) -> bytes:
+    return struct.pack("<I", tag | (len(payload) << 20)) + payload
+
+
+DEFAULT_TEXT = "한글 문서 본문입니다. "
+
+
+def make_section(paragraphs: int, text: str = DEFAULT_TEXT) -> bytes:
+    """문단 헤더/텍스트/글자 모양/줄 정보 레코드로 이루어진 합성 섹션을 만듭니다."""
+    para_header = _record(HWPTAG_PARA_HEADER, b"\x00" * 22)
+    char_shape = _record(HWPTAG_PARA_CHAR_SHAPE, b"\x00" * 8)
+    line_seg = _record(HWPTAG_PARA_LINE_SEG, b"\x00" * 36)
+    out = bytearray()
+    for i in range(paragraphs):
+        para_text = _record(HWPTAG_PARA_TEXT, f"{text}{i}".encode("utf-16-le"))
+        out += para_header + para_text + char_shape + line_seg
+    return bytes(out)
+
+
+def compress(data: bytes) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def legacy_scan(data: bytes) -> list:
+    """기존 HWPLoader 의 스캔 방식 (전체 압축 해제 후 슬라이싱)"""
+    unpacked_data = zlib.decompress(data, -15)
+    text = []
+    i = 0
+    while i < len(unpacked_data):
+        header = struct.unpack_from("<I", unpacked_data[i : i + 4])[0]
+        rec_type = header & 0x3FF
+        rec_len = (header >> 20) & 0xFFF
+        if rec_type == HWPTAG_PARA_TEXT:
+            rec_data = unpacked_data[i + 4 : i + 4 + rec_len]
+            text.append(rec_data.decode("utf-16"))
+        i += 4 + rec_len
+    return text
+
+
+def memoryview_scan(data: bytes) -> list:
+    """iter_hwp_records 를 사용한 스캔 방식"""
+    return [
+        str(rec_data, "utf-16")
+        for _, _, _, rec_data in iter_hwp_records(
+            io.BytesIO(data), compressed=True, tags={HWPTAG_PARA_TEXT}
+        )
+    ]
+
+
+def measure(name: str, func: Callable[[Any], Any], data: Any, repeat: int):
+    """최소 실행 시간과 최대 메모리 사용량을 측정합니다."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(data)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<16} {best * 1000:>10.1f} ms {peak / 1024 / 1024:>10.1f} MiB")
+    return result
+
+
+def bench_records(paragraphs: int, repeat: int) -> None:
+    section = make_section(paragraphs)
+    data = compress(section)
+    print(
+        f"문단 {paragraphs:,}개, 압축 해제 {len(section) / 1024 / 1024:.1f} MiB, "
+        f"압축 {len(data) / 1024 / 1024:.1f} MiB"
+    )
+    print(f"{'scanner':<16} {'time':>13} {'peak':>14}")
+    expected = measure("legacy", legacy_scan, data, repeat)
+    actual = measure("memoryview", memoryview_scan, data, repeat)
+    assert actual == expected, "스캔 결과가 다릅니다."
+
+
+def make_text(megabytes: float) -> str:
+    """한글, 한자, 제어 문자, 서식 문자가 섞인 합성 텍스트를 만듭니다."""
+    line = "제1조(목적) 이 規程은 업무 처리 기준을 정한다.\t\x0b\u200b본문 ABC 123\n"
+    return line * int(megabytes * 1024 * 1024 / len(line.encode("utf-8")))
+
+
+def legacy_normalize(text: str) -> str:
+    """기존 HWPLoader 의 두 단계 정규화"""
+    text = HWPLoader.remove_chinese_characters(text)
+    return HWPLoader.remove_control_characters(text)
+
+
+def bench_normalize(megabytes: float, repeat: int) -> None:
+    text = make_text(megabytes)
+    normalizer = HWPTextNormalizer()
+    start = time.perf_counter()
+    normalizer("warm up")
+    elapsed = time.perf_counter() - start
+    print(f"BMP 정규식 컴파일 {elapsed * 1000:.1f} ms (프로세스당 1회)")
+    print(f"텍스트 {len(text):,}자 ({megabytes} MiB)")
+    print(f"{'normalizer':<16} {'time':>13} {'peak':>14}")
+    expected = measure("legacy", legacy_normalize, text, repeat)
+    actual = measure("compiled", normalizer, text, repeat)
+    assert actual == expected, "정규화 결과가 다릅니다."
+    astral = text + "\U0001f600\U000e0001"
+    start = time.perf_counter()
+    normalizer("\U0001f600")
+    elapsed = time.perf_counter() - start
+    print(f"비BMP 정규식 컴파일 {elapsed * 1000:.1f} ms (비BMP 문자가 처음 나올 때 1회)")
+    assert normalizer(astral) == legacy_normalize(astral), "정규화 결과가 다릅니다."
+
+
+def make_hwpx(paragraphs: int, text: str = DEFAULT_TEXT) -> bytes:
+    """make_section 과 같은 문단으로 이루어진 합성 HWPX 파일을 만듭니다."""
+    body = "".join(
+        f'<hp:p id="{i}" paraPrIDRef="0" styleIDRef="0">'
+        f'<hp:run charPrIDRef="0"><hp:t>{escape(f"{text}{i}")}</hp:t></hp:run>'
+        f'<hp:linesegarray><hp:lineseg textpos="0" vertpos="0"/></hp:linesegarray>'
+        f"</hp:p>"
+        for i in range(paragraphs)
+    )
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<hs:sec xmlns:hs="http://www.hancom.co.kr/hwpml/2011/section" '
+        f'xmlns:hp="{HWPX_PARAGRAPH_NS}">{body}</hs:sec>'
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("mimetype", HWPX_MIMETYPE, compress_type=zipfile.ZIP_STORED)
+        zf.writestr("Contents/section0.xml", xml)
+    return out.getvalue()
+
+
+def bench_hwpx(paragraphs: int, repeat: int) -> None:
+    normalizer = HWPTextNormalizer()
+    normalizer("warm up")
+    ole_data = compress(make_section(paragraphs))
+    hwpx_data = make_hwpx(paragraphs)
+
+    def ole_extract(data: bytes) -> str:
+        return normalizer("\n".join(memoryview_scan(data)))
+
+    def hwpx_extract(data: bytes) -> str:
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            with zf.open("Contents/section0.xml") as stream:
+                return normalizer("\n".join(iter_hwpx_paragraphs(stream)))
+
+    print(
+        f"문단 {paragraphs:,}개, HWP 섹션 {len(ole_data) / 1024 / 1024:.1f} MiB, "
+        f"HWPX {len(hwpx_data) / 1024 / 1024:.1f} MiB (압축 기준)"
+    )
+    print(f"{'format':<16} {'time':>13} {'peak':>14}")
+    expected = measure("hwp (ole)", ole_extract, ole_data, repeat)
+    actual = measure("hwpx (xml)", hwpx_extract, hwpx_data, repeat)
+    assert actual == expected, "추출 결과가 다릅니다."
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HWP 로더 벤치마크")
+    subparsers = parser.add_subparsers(dest="target", required=True)
+
+    records_parser = subparsers.add_parser("records", help="레코드 스캐너 비교")
+    records_parser.add_argument("--paragraphs", type=int, default=200_000)
+    records_parser.add_argument("--repeat", type=int, default=3)
+
+    normalize_parser = subparsers.add_parser("normalize", help="텍스트 정규화 비교")
+    normalize_parser.add_argument("--megabytes", type=float, default=8)
+    normalize_parser.add_argument("--repeat", type=int, default=3)
+
+    hwpx_parser = subparsers.add_parser("hwpx", help="HWP(OLE) 와 HWPX 추출 비교")
+    hwpx_parser.add_argument("--paragraphs", type=int, default=200_000)
+    hwpx_parser.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.target == "records":
+        bench_records(args.paragraphs, args.repeat)
+    elif args.target == "normalize":
+        bench_normalize(args.megabytes, args.repeat)
+    elif args.target == "hwpx":
+        bench_hwpx(args.paragraphs, args.repeat)
@@ -0,0 +1,117 @@
+import re
+import zipfile
+from typing import IO, Iterator, List
+from xml.etree.ElementTree import iterparse
+
+from langchain.schema import Document
+
+from share.document_loaders.hwp import HWPLoader
+
+HWPX_MIMETYPE = "application/hwp+zip"
+HWPX_PARAGRAPH_NS = "http://www.hancom.co.kr/hwpml/2011/paragraph"
+HWPX_PARAGRAPH_TAG = f"{{{HWPX_PARAGRAPH_NS}}}p"
+HWPX_RUN_TAG = f"{{{HWPX_PARAGRAPH_NS}}}run"
+HWPX_TEXT_TAG = f"{{{HWPX_PARAGRAPH_NS}}}t"
+HWPX_SECTION_PATTERN = re.compile(r"Contents/section(\d+)\.xml")
+
+
+def iter_hwpx_paragraphs(stream: IO[bytes]) -> Iterator[str]:
+    """섹션 XML 을 iterparse 로 읽으면서 문단(hp:p) 텍스트를 하나씩 반환합니다.
+
+    처리한 최상위 문단은 바로 트리에서 제거하므로 메모리 사용량이
+    섹션 크기와 무관하게 문단 하나 크기로 유지됩니다.
+    표 안의 문단처럼 중첩된 문단은 바깥 문단보다 먼저 반환됩니다.
+    """
+    depth = 0
+    root = None
+    for event, elem in iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            elif elem.tag == HWPX_PARAGRAPH_TAG:
+                depth += 1
+            continue
+
+        if elem.tag != HWPX_PARAGRAPH_TAG:
+            continue
+
+        # 중첩 문단은 이미 반환했으므로 이 문단에 직접 속한 hp:run/hp:t 만 읽습니다.
+        text = []
+        for run in elem.iterfind(HWPX_RUN_TAG):
+            for t in run.iterfind(HWPX_TEXT_TAG):
+                if t.text:
+                    text.append(t.text)
+                # hp:tab 등 인라인 요소 뒤의 텍스트
+                text.extend(child.tail for child in t if child.tail)
+        yield "".join(text)
+
+        depth -= 1
+        if depth == 0:
+            elem.clear()
+            root.clear()
+
+
+class HWPXLoader(HWPLoader):
+    """HWPX 파일 읽기 클래스. HWPX(zip + XML) 파일의 내용을 읽습니다.
+
+    mode, paragraphs_per_document, normalizer 와 반환하는 Document 는 HWPLoader 와 같습니다.
+    XML 에는 레코드 바이트 위치가 없으므로 metadata 에 start_offset / end_offset 은 없습니다.
+    """
+
+    def lazy_load(self) -> Iterator[Document]:
+        """HWPX 파일에서 데이터를 로드합니다.
+
+        Yields:
+            Document: 추출된 문서
+        """
+        with zipfile.ZipFile(self.file_path) as load_file:
+            if not self._is_valid_hwpx(load_file):
+                raise ValueError("유효하지 않은 HWPX 파일입니다.")
+
+            sections = self._get_hwpx_sections(load_file)
+
+            if self.mode == "single":
+                separator = self._normalize_text("\n")
+                texts = []
+                for section in sections:
+                    with load_file.open(section) as stream:
+                        texts.append(
+                            separator.join(
+                                self._normalize_text(text)
+                                for text in iter_hwpx_paragraphs(stream)
+                            )
+                        )
+                yield self._create_document(
+                    text="\n".join(texts), extra_info=self.extra_info
+                )
+                return
+
+            start_index = 0
+            for section_index, section in enumerate(sections):
+                with load_file.open(section) as stream:
+                    paragraphs = [
+                        (None, None, text) for text in iter_hwpx_paragraphs(stream)
+                    ]
+                section_length = yield from self._load_section(
+                    paragraphs, section_index, section, start_index
+                )
+                start_index += section_length + 1
+
+    @staticmethod
+    def _is_valid_hwpx(load_file: zipfile.ZipFile) -> bool:
+        """HWPX 파일의 유효성을 검사합니다."""
+        try:
+            mimetype = load_file.read("mimetype").decode("ascii").strip()
+        except KeyError:
+            return False
+        return mimetype == HWPX_MIMETYPE
+
+    @staticmethod
+    def _get_hwpx_sections(load_file: zipfile.ZipFile) -> List[str]:
+        """본문 섹션 XML 목록을 순서대로 반환합니다."""
+        sections = []
+        for name in load_file.namelist():
+            match = HWPX_SECTION_PATTERN.fullmatch(name)
+            if match:
+                sections.append((int(match.group(1)), name))
+        return [name for _, name in sorted(sections)]
@@ -1,18 +1,36 @@
-from typing import List
+import asyncio
+from typing import Any, List, Optional
 
-from elasticsearch import Elasticsearch
+from elasticsearch import AsyncElasticsearch, Elasticsearch
 from langchain_community.retrievers import ElasticSearchBM25Retriever
-from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.callbacks import (
+    AsyncCallbackManager,
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManager,
+    CallbackManagerForRetrieverRun,
+)
 from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import get_config_list
 
 
 class CustomElasticSearchBM25Retriever(ElasticSearchBM25Retriever):
     def __init__(
-        self, client: Elasticsearch, index_name: str, filter: dict = {}, k: int = 4
+        self,
+        client: Elasticsearch,
+        index_name: str,
+        filter: dict = {},
+        k: int = 4,
+        async_client: Optional[AsyncElasticsearch] = None,
+        request_cache: bool = False,
     ) -> None:
         super().__init__(client=client, index_name=index_name)
         self._k = k
         self._filter = filter
+        # ainvoke, abatch 에 사용할 비동기 클라이언트 (없으면 스레드에서 client 사용)
+        self._async_client = async_client
+        # 같은 질의가 반복될 때 샤드 request cache 사용 (size > 0 이라 요청마다 지정해야 함)
+        self._request_cache = request_cache
 
     def build_filter_query(self) -> List:
         _filter_query = []
@@ -24,16 +42,25 @@ class CustomElasticSearchBM25Retriever(ElasticSearchBM25Retriever):
 
         return _filter_query
 
-    def _get_relevant_documents(
-        self, query: str, run_manager: CallbackManagerForRetrieverRun
-    ) -> List[Document]:
-        must_clauses = self.build_filter_query()
-        must_clauses.append(({"match": {"text": query}}))
-        query_dict = {
-            "query": {"bool": {"must": must_clauses}},
-            "size": self._k,
-        }  # self._k 사용
-        res = self.client.search(index=self.index_name, body=query_dict)
+    def build_query(self, query: str) -> dict:
+        """metadata 필터는 점수를 매기지 않고 filter cache 를 쓰도록 filter 절에 넣습니다."""
+        bool_query = {"must": [{"match": {"text": query}}]}
+        filter_clauses = self.build_filter_query()
+        if filter_clauses:
+            bool_query["filter"] = filter_clauses
+        return {
+            "query": {"bool": bool_query},
+            "size": self._k,  # self._k 사용
+            # 벡터 등 다른 필드는 받지 않고, 전체 hit 수는 세지 않습니다.
+            "_source": ["text", "metadata"],
+            "track_total_hits": False,
+        }
+
+    def search_params(self) -> dict:
+        return {"request_cache": True} if self._request_cache else {}
+
+    @staticmethod
+    def parse_hits(res) -> List[Document]:
         docs = []
         for r in res["hits"]["hits"]:
             doc = Document.model_validate(
@@ -45,6 +72,147 @@ class CustomElasticSearchBM25Retriever(ElasticSearchBM25Retriever):
             docs.append(doc)
         return docs
 
+    def build_msearch_body(self, queries: List[str]) -> List[dict]:
+        """여러 질의를 _msearch 요청 본문(header, body 쌍)으로 만듭니다."""
+        body = []
+        for query in queries:
+            body.append({"index": self.index_name, **self.search_params()})
+            body.append(self.build_query(query))
+        return body
+
+    def parse_msearch(self, res) -> List[Any]:
+        """_msearch 응답을 질의별 Document 목록으로 나눕니다. 실패한 질의는 예외 객체입니다."""
+        results = []
+        for response in res["responses"]:
+            if "error" in response:
+                results.append(
+                    RuntimeError(
+                        f"검색 실패 ({response.get('status')}): {response['error']}"
+                    )
+                )
+            else:
+                results.append(self.parse_hits(response))
+        return results
+
+    def _get_relevant_documents(
+        self, query: str, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        res = self.client.search(
+            index=self.index_name, body=self.build_query(query), **self.search_params()
+        )
+        return self.parse_hits(res)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        if self._async_client is None:
+            return await super()._aget_relevant_documents(
+                query, run_manager=run_manager
+            )
+        res = await self._async_client.search(
+            index=self.index_name, body=self.build_query(query), **self.search_params()
+        )
+        return self.parse_hits(res)
+
+    def search_many(self, queries: List[str]) -> List[Any]:
+        """여러 질의를 _msearch 한 번으로 검색합니다."""
+        if not queries:
+            return []
+        res = self.client.msearch(body=self.build_msearch_body(queries))
+        return self.parse_msearch(res)
+
+    async def asearch_many(self, queries: List[str]) -> List[Any]:
+        """search_many 의 비동기 버전입니다."""
+        if not queries:
+            return []
+        if self._async_client is None:
+            return await asyncio.to_thread(self.search_many, queries)
+        res = await self._async_client.msearch(body=self.build_msearch_body(queries))
+        return self.parse_msearch(res)
+
+    def _callback_managers(self, configs: List[RunnableConfig], manager_cls):
+        return [
+            manager_cls.configure(
+                config.get("callbacks"),
+                None,
+                inheritable_tags=config.get("tags"),
+                local_tags=self.tags,
+                inheritable_metadata=config.get("metadata"),
+                local_metadata=self.metadata,
+            )
+            for config in configs
+        ]
+
+    @staticmethod
+    def _finish(results, run_managers, return_exceptions):
+        for result, run_manager in zip(results, run_managers):
+            if isinstance(result, Exception):
+                run_manager.on_retriever_error(result)
+            else:
+                run_manager.on_retriever_end(result)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+    def batch(
+        self,
+        inputs: List[str],
+        config: Optional[RunnableConfig | List[RunnableConfig]] = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[Any]:
+        """모든 질의를 _msearch 요청 한 번으로 검색합니다."""
+        configs = get_config_list(config, len(inputs))
+        run_managers = [
+            callback_manager.on_retriever_start(
+                None, query, name=config.get("run_name") or self.get_name()
+            )
+            for callback_manager, query, config in zip(
+                self._callback_managers(configs, CallbackManager), inputs, configs
+            )
+        ]
+        try:
+            results = self.search_many(inputs)
+        except Exception as e:
+            results = [e] * len(inputs)
+        return self._finish(results, run_managers, return_exceptions)
+
+    async def abatch(
+        self,
+        inputs: List[str],
+        config: Optional[RunnableConfig | List[RunnableConfig]] = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[Any]:
+        """batch 의 비동기 버전입니다."""
+        configs = get_config_list(config, len(inputs))
+        run_managers = [
+            await callback_manager.on_retriever_start(
+                None, query, name=config.get("run_name") or self.get_name()
+            )
+            for callback_manager, query, config in zip(
+                self._callback_managers(configs, AsyncCallbackManager), inputs, configs
+            )
+        ]
+        try:
+            results = await self.asearch_many(inputs)
+        except Exception as e:
+            results = [e] * len(inputs)
+        for result, run_manager in zip(results, run_managers):
+            if isinstance(result, Exception):
+                await run_manager.on_retriever_error(result)
+            else:
+                await run_manager.on_retriever_end(result)
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
 
 if __name__ == "__main__":
     question = "형태"
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+from typing import Any, List, Optional
+
+from elasticsearch import ApiError, AsyncElasticsearch, Elasticsearch
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from share.langchain.retriever.custom_elastic_search_bm25 import (
+    CustomElasticSearchBM25Retriever,
+)
+
+logger = logging.getLogger(__name__)
+
+FUSION_METHODS = ("rrf", "weighted")
+# weighted 에서 BM25 점수를 score / (score + pivot) 으로 0~1 범위로 바꾸는 script
+BM25_SATURATION_SCRIPT = "_score / (_score + params.pivot)"
+# rrf retriever 를 지원하지 않는 버전(8.14 미만)이나 라이선스에서 나오는 오류 메시지의 일부
+RRF_UNSUPPORTED_MESSAGES = ("[retriever]", "rrf", "rank fusion")
+
+
+class CustomElasticSearchHybridRetriever(CustomElasticSearchBM25Retriever):
+    """BM25 match 와 knn 검색을 Elasticsearch 요청 한 번으로 합치는 retriever.
+
+    ElasticsearchStore 로 만든 인덱스(text, metadata, vector 필드)를 검색합니다.
+
+    - fusion="rrf": rrf retriever 로 두 결과를 reciprocal rank fusion 합니다.
+      (Elasticsearch 8.14 이상, 라이선스에 따라 사용할 수 없을 수 있습니다)
+      rrf 를 쓸 수 없다는 오류를 받으면 경고를 남기고 weighted 로 바꿔 다시 검색합니다.
+    - fusion="weighted": query 와 knn 을 함께 보내 boost 를 곱한 점수의 합으로 정렬합니다.
+      범위가 정해져 있지 않은 BM25 점수는 score / (score + bm25_pivot) 로 knn 점수와 같은
+      0~1 범위로 바꿉니다. bm25_pivot 은 상위 문서 BM25 점수의 중앙값 정도로 맞춥니다.
+    """
+
+    def __init__(
+        self,
+        client: Elasticsearch,
+        index_name: str,
+        embedding: Embeddings,
+        filter: dict = {},
+        k: int = 4,
+        async_client: Optional[AsyncElasticsearch] = None,
+        request_cache: bool = False,
+        fusion: str = "rrf",
+        bm25_weight: float = 0.5,
+        vector_weight: float = 0.5,
+        bm25_pivot: float = 10.0,
+        rank_constant: int = 60,
+        rank_window_size: Optional[int] = None,
+        num_candidates: int = 50,
+        vector_field: str = "vector",
+    ) -> None:
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"fusion 은 {FUSION_METHODS} 중 하나여야 합니다: {fusion}")
+        super().__init__(
+            client=client,
+            index_name=index_name,
+            filter=filter,
+            k=k,
+            async_client=async_client,
+            request_cache=request_cache,
+        )
+        self._embedding = embedding
+        self._fusion = fusion
+        self._bm25_weight = bm25_weight
+        self._vector_weight = vector_weight
+        self._bm25_pivot = bm25_pivot
+        self._rank_constant = rank_constant
+        # 각 검색에서 융합할 상위 문서 수 (기본값은 k, EnsembleRetriever 와 같음)
+        self._rank_window_size = max(rank_window_size or k, k)
+        self._num_candidates = max(num_candidates, self._rank_window_size)
+        self._vector_field = vector_field
+
+    def build_knn(self, query_vector: List[float], k: int) -> dict:
+        knn = {
+            "field": self._vector_field,
+            "query_vector": query_vector,
+            "k": k,
+            "num_candidates": self._num_candidates,
+        }
+        filter_clauses = self.build_filter_query()
+        if filter_clauses:
+            knn["filter"] = filter_clauses
+        return knn
+
+    def build_query(
+        self, query: str, query_vector: Optional[List[float]] = None
+    ) -> dict:
+        """BM25 질의와 knn 을 합친 검색 본문을 만듭니다. query_vector 가 없으면 임베딩합니다."""
+        if query_vector is None:
+            query_vector = self._embedding.embed_query(query)
+        body = super().build_query(query)
+        bm25_query = body.pop("query")
+
+        if self._fusion == "rrf":
+            body["retriever"] = {
+                "rrf": {
+                    "retrievers": [
+                        {"standard": {"query": bm25_query}},
+                        {"knn": self.build_knn(query_vector, self._rank_window_size)},
+                    ],
+                    "rank_constant": self._rank_constant,
+                    "rank_window_size": self._rank_window_size,
+                }
+            }
+        else:
+            body["query"] = {
+                "script_score": {
+                    "query": bm25_query,
+                    "script": {
+                        "source": BM25_SATURATION_SCRIPT,
+                        "params": {"pivot": self._bm25_pivot},
+                    },
+                    "boost": self._bm25_weight,
+                }
+            }
+            body["knn"] = {
+                **self.build_knn(query_vector, self._k),
+                "boost": self._vector_weight,
+            }
+        return body
+
+    def build_msearch_body(
+        self, queries: List[str], query_vectors: Optional[List[List[float]]] = None
+    ) -> List[dict]:
+        if query_vectors is None:
+            query_vectors = [self._embedding.embed_query(query) for query in queries]
+        body = []
+        for query, query_vector in zip(queries, query_vectors):
+            body.append({"index": self.index_name, **self.search_params()})
+            body.append(self.build_query(query, query_vector))
+        return body
+
+    def fallback_to_weighted(self, error: Exception) -> bool:
+        """rrf retriever 를 쓸 수 없다는 오류이면 fusion 을 weighted 로 바꾸고 True 를 반환합니다."""
+        if self._fusion != "rrf":
+            return False
+        # ApiError 는 문자열에 오류 원인만 담으므로 응답 본문도 확인합니다.
+        message = f"{error} {getattr(error, 'body', '')}".lower()
+        if not any(text in message for text in RRF_UNSUPPORTED_MESSAGES):
+            return False
+        logger.warning(
+            f"rrf retriever 를 사용할 수 없어 weighted 로 검색합니다 ({self.index_name}): {error}"
+        )
+        self._fusion = "weighted"
+        return True
+
+    def _get_relevant_documents(
+        self, query: str, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        try:
+            return super()._get_relevant_documents(query, run_manager=run_manager)
+        except ApiError as e:
+            if not self.fallback_to_weighted(e):
+                raise
+        return super()._get_relevant_documents(query, run_manager=run_manager)
+
+    def search_many(self, queries: List[str]) -> List[Any]:
+        results = super().search_many(queries)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors and self.fallback_to_weighted(errors[0]):
+            results = super().search_many(queries)
+        return results
+
+    async def _asearch(self, query: str) -> List[Document]:
+        query_vector = await self._embedding.aembed_query(query)
+        res = await self._async_client.search(
+            index=self.index_name,
+            body=self.build_query(query, query_vector),
+            **self.search_params(),
+        )
+        return self.parse_hits(res)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        if self._async_client is None:
+            return await super()._aget_relevant_documents(
+                query, run_manager=run_manager
+            )
+        try:
+            return await self._asearch(query)
+        except ApiError as e:
+            if not self.fallback_to_weighted(e):
+                raise
+        return await self._asearch(query)
+
+    async def _asearch_many(self, queries: List[str]) -> List[Any]:
+        query_vectors = await asyncio.gather(
+            *(self._embedding.aembed_query(query) for query in queries)
+        )
+        res = await self._async_client.msearch(
+            body=self.build_msearch_body(queries, query_vectors)
+        )
+        return self.parse_msearch(res)
+
+    async def asearch_many(self, queries: List[str]) -> List[Any]:
+        if not queries:
+            return []
+        if self._async_client is None:
+            return await asyncio.to_thread(self.search_many, queries)
+        results = await self._asearch_many(queries)
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors and self.fallback_to_weighted(errors[0]):
+            results = await self._asearch_many(queries)
+        return results
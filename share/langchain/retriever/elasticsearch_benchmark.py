@@ -0,0 +1,688 @@
+"""Elasticsearch retriever 벤치마크
+
+로컬 Elasticsearch 대용 서버(LocalElasticsearch)에 PDF 청크를 넣고 측정합니다.
+--es-url 을 주면 실제 Elasticsearch 노드에 인덱스를 만들어 측정합니다.
+
+실행 예:
+    python -m share.langchain.retriever.elasticsearch_benchmark msearch --latency 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+import numpy as np
+from elasticsearch import AsyncElasticsearch, Elasticsearch, helpers
+from langchain.retrievers import EnsembleRetriever
+from langchain_community.document_loaders import PDFPlumberLoader
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from rank_bm25 import BM25Okapi
+
+from share.langchain.retriever.custom_elastic_search_bm25 import (
+    CustomElasticSearchBM25Retriever,
+)
+from share.langchain.retriever.custom_elastic_search_hybrid import (
+    CustomElasticSearchHybridRetriever,
+)
+from share.langchain.retriever.kiwi_bm25 import KiwiBM25Retriever
+
+DEFAULT_PDF = "99_projects/data/2024_프로야구_리그규정_요약.pdf"
+
+# ElasticsearchStore 가 저장하는 vector 필드 크기 (text-embedding-3-small)
+VECTOR_DIMS = 1536
+
+QUESTIONS = [
+    "각 구단은 몇 경기씩 해?",
+    "타이브레이크 경기는 어떻게 진행돼?",
+    "연장전은 몇 회까지 진행하나요?",
+    "엔트리 등록 인원은 몇 명이야?",
+    "우천으로 경기가 취소되면 어떻게 해?",
+    "외국인 선수는 몇 명까지 출전할 수 있어?",
+    "포스트시즌 진출 팀은 몇 팀이야?",
+    "비디오 판독은 몇 번 신청할 수 있어?",
+]
+
+# recall 측정용 질문과 정답 청크에 들어 있는 문구
+LABELED_QUESTIONS = {
+    "각 구단은 정규시즌에 몇 경기를 치러?": "144경기",
+    "연장전은 몇 회까지 진행하나요?": "연장전은 12회",
+    "현역선수는 몇 명까지 등록할 수 있어?": "현역선수 28명",
+    "우천으로 경기를 못 하면 어떻게 돼?": "우천 및 기타 사유",
+    "수비 시프트 위반에 비디오 판독을 요청할 수 있어?": "비디오 판독 요청",
+    "부상자 명단에 등재하려면 어떤 서류를 내야 해?": "부상자 명단",
+    "원정구단은 경기 전에 언제까지 타격연습을 해?": "원정구단의 준비운동",
+    "미세먼지 경보가 내려지면 경기를 취소하나요?": "미세먼지 경보",
+    "선발투수 예고는 언제까지 통보해야 해?": "선발투수 예고",
+    "경기사용구는 누가 구입해서 공급해?": "경기사용구를 월 1회",
+    "출장정지 제재를 받으면 어떤 경기에 못 나가?": "출장정지 제재를 받은 자",
+    "강풍 주의보의 풍속 기준은?": "순간풍속 20m/s",
+}
+
+
+def load_chunks(pdf_path: str = DEFAULT_PDF) -> List[Document]:
+    """99_projects/embedding_pdf.py 와 같은 설정으로 PDF 를 분할합니다."""
+    docs = PDFPlumberLoader(pdf_path).load()
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=50)
+    return text_splitter.split_documents(docs)
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+class LatencyEmbeddings(DeterministicFakeEmbedding):
+    """질의 임베딩마다 latency 초를 기다리는 가짜 임베딩 (임베딩 API 호출 시간 흉내)."""
+
+    latency: float = 0.0
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+
+class KnnRetriever(BaseRetriever):
+    """ElasticsearchStore.as_retriever() 와 같은 knn 질의를 보내는 retriever.
+
+    langchain-elasticsearch 없이 기존 EnsembleRetriever 구성을 재현하기 위해 사용합니다.
+    """
+
+    client: Elasticsearch
+    index_name: str
+    embedding: Embeddings
+    k: int = 4
+    num_candidates: int = 50
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        res = self.client.search(
+            index=self.index_name,
+            knn={
+                "field": "vector",
+                "query_vector": self.embedding.embed_query(query),
+                "k": self.k,
+                "num_candidates": self.num_candidates,
+                "filter": [],
+            },
+            size=self.k,
+            source=["text", "metadata"],
+        )
+        return CustomElasticSearchBM25Retriever.parse_hits(res)
+
+
+class LocalElasticsearch:
+    """Elasticsearch 의 _search, _msearch 일부만 흉내 내는 로컬 HTTP 서버. 벤치마크용입니다.
+
+    bool 질의의 must/filter/should 안의 match(BM25), term, BM25 정규화 script_score 와
+    knn(정확한 cosine 검색), rrf retriever 만 지원합니다. 요청마다 latency 초를 기다려 네트워크 왕복 시간을 흉내 냅니다.
+    실제 Elasticsearch 의 캐시는 흉내 내지 않습니다.
+    """
+
+    def __init__(
+        self,
+        docs: List[Document],
+        latency: float = 0.01,
+        embedding: Optional[Embeddings] = None,
+    ):
+        self.docs = docs
+        self.latency = latency
+        self.requests = 0
+        self._bm25 = BM25Okapi([tokenize(doc.page_content) for doc in docs])
+        # ElasticsearchStore 처럼 _source 에 vector 필드를 함께 저장합니다.
+        self.vectors = (
+            embedding.embed_documents([doc.page_content for doc in docs])
+            if embedding
+            else None
+        )
+        if self.vectors is not None:
+            vectors = np.array(self.vectors)
+            self._unit_vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _term_matches(self, doc: Document, term: dict) -> bool:
+        (field, value), = term.items()
+        if isinstance(value, dict):
+            value = value["value"]
+        key = field.removeprefix("metadata.").removesuffix(".keyword")
+        return str(doc.metadata.get(key)) == str(value)
+
+    def _clause_scores(self, clause: dict) -> np.ndarray:
+        """질의 절의 문서별 점수를 반환합니다. 조건에 맞지 않는 문서는 -inf 입니다."""
+        if "match" in clause:
+            (_, value), = clause["match"].items()
+            boost = 1.0
+            if isinstance(value, dict):
+                boost = value.get("boost", 1.0)
+                value = value["query"]
+            scores = self._bm25.get_scores(tokenize(value)) * boost
+            return np.where(scores > 0, scores, -np.inf)
+        if "term" in clause:
+            return np.array(
+                [
+                    0.0 if self._term_matches(doc, clause["term"]) else -np.inf
+                    for doc in self.docs
+                ]
+            )
+        if "bool" in clause:
+            return self._bool_scores(clause["bool"])
+        if "script_score" in clause:
+            # hybrid retriever 의 BM25 정규화 script (score / (score + pivot)) 만 지원합니다.
+            script_score = clause["script_score"]
+            scores = self._clause_scores(script_score["query"])
+            pivot = script_score["script"]["params"]["pivot"]
+            matched = np.isfinite(scores)
+            bm25 = np.where(matched, scores, 0.0)
+            normalized = bm25 / (bm25 + pivot)
+            return np.where(matched, normalized * script_score.get("boost", 1.0), -np.inf)
+        if "match_all" in clause:
+            return np.zeros(len(self.docs))
+        raise ValueError(f"지원하지 않는 질의: {clause}")
+
+    def _bool_scores(self, query: dict) -> np.ndarray:
+        scores = np.zeros(len(self.docs))
+        for clause in query.get("must", []):
+            scores += self._clause_scores(clause)
+        for clause in query.get("filter", []):
+            # filter 절은 점수에 영향을 주지 않습니다.
+            scores += np.where(np.isinf(self._clause_scores(clause)), -np.inf, 0.0)
+        should = query.get("should", [])
+        if should:
+            should_scores = np.stack([self._clause_scores(c) for c in should])
+            matched = np.isfinite(should_scores)
+            scores += np.where(matched, should_scores, 0.0).sum(axis=0)
+            if not query.get("must") and not query.get("filter"):
+                scores[~matched.any(axis=0)] = -np.inf
+        return scores
+
+    def _knn_scores(self, knn: dict) -> np.ndarray:
+        """filter 를 만족하는 문서 중 cosine 유사도 상위 k 개의 점수 ((1 + cos) / 2)."""
+        query = np.array(knn["query_vector"])
+        scores = (1 + self._unit_vectors @ (query / np.linalg.norm(query))) / 2
+        for clause in knn.get("filter", []):
+            scores = np.where(np.isinf(self._clause_scores(clause)), -np.inf, scores)
+        top = np.argsort(-scores, kind="stable")[: knn["k"]]
+        result = np.full(len(self.docs), -np.inf)
+        result[top] = scores[top] * knn.get("boost", 1.0)
+        return result
+
+    def _retriever_scores(self, retriever: dict) -> np.ndarray:
+        if "standard" in retriever:
+            return self._clause_scores(retriever["standard"]["query"])
+        if "knn" in retriever:
+            return self._knn_scores(retriever["knn"])
+        rrf = retriever["rrf"]
+        fused = np.full(len(self.docs), -np.inf)
+        for child in rrf["retrievers"]:
+            scores = self._retriever_scores(child)
+            order = [i for i in np.argsort(-scores, kind="stable") if np.isfinite(scores[i])]
+            for rank, i in enumerate(order[: rrf["rank_window_size"]], start=1):
+                fused[i] = max(fused[i], 0.0) + 1 / (rrf["rank_constant"] + rank)
+        return fused
+
+    def _scores(self, body: dict) -> np.ndarray:
+        if "retriever" in body:
+            return self._retriever_scores(body["retriever"])
+        if "knn" not in body:
+            return self._clause_scores(body.get("query", {"match_all": {}}))
+        # query 와 knn 을 함께 보내면 둘 중 하나에 걸린 문서의 점수 합으로 정렬합니다.
+        knn_scores = self._knn_scores(body["knn"])
+        if "query" not in body:
+            return knn_scores
+        query_scores = self._clause_scores(body["query"])
+        matched = np.isfinite(query_scores) | np.isfinite(knn_scores)
+        total = np.where(np.isfinite(query_scores), query_scores, 0.0) + np.where(
+            np.isfinite(knn_scores), knn_scores, 0.0
+        )
+        return np.where(matched, total, -np.inf)
+
+    def search(self, body: dict) -> dict:
+        scores = self._scores(body)
+        size = body.get("size", 10)
+        order = [i for i in np.argsort(-scores, kind="stable") if np.isfinite(scores[i])]
+        source = body.get("_source", True)
+        hits = []
+        for i in order[:size]:
+            doc_source = {"text": self.docs[i].page_content, "metadata": self.docs[i].metadata}
+            if self.vectors is not None:
+                doc_source["vector"] = self.vectors[i]
+            if isinstance(source, list):
+                doc_source = {key: doc_source[key] for key in source if key in doc_source}
+            hits.append({"_id": str(i), "_score": float(scores[i]), "_source": doc_source})
+        response = {
+            "took": 1,
+            "timed_out": False,
+            "hits": {"max_score": hits[0]["_score"] if hits else None, "hits": hits},
+        }
+        if body.get("track_total_hits", True) is not False:
+            response["hits"]["total"] = {"value": len(order), "relation": "eq"}
+        return response
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, payload: dict):
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("X-Elastic-Product", "Elasticsearch")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self):
+                server.requests += 1
+                time.sleep(server.latency)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length).decode() if length else ""
+                path = self.path.split("?")[0]
+                if path.endswith("/_msearch"):
+                    lines = [json.loads(line) for line in raw.splitlines() if line]
+                    responses = [server.search(body) for body in lines[1::2]]
+                    self._send({"took": 1, "responses": responses})
+                elif path.endswith("/_search"):
+                    self._send(server.search(json.loads(raw) if raw else {}))
+                else:
+                    self._send({"version": {"number": "8.15.0"}, "tagline": "stand-in"})
+
+            do_GET = do_POST = _handle
+
+        return Handler
+
+    def start(self) -> "LocalElasticsearch":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def seed_index(
+    client: Elasticsearch,
+    index_name: str,
+    docs: List[Document],
+    embedding: Embeddings,
+) -> None:
+    """실제 Elasticsearch 에 ElasticsearchStore 와 같은 형식(text, metadata, vector)으로 문서를 넣습니다."""
+    client.options(ignore_status=404).indices.delete(index=index_name)
+    client.indices.create(
+        index=index_name,
+        mappings={
+            "properties": {
+                "text": {"type": "text"},
+                "vector": {
+                    "type": "dense_vector",
+                    "dims": VECTOR_DIMS,
+                    "index": True,
+                    "similarity": "cosine",
+                },
+            }
+        },
+    )
+    vectors = embedding.embed_documents([doc.page_content for doc in docs])
+    helpers.bulk(
+        client,
+        (
+            {
+                "_index": index_name,
+                "_id": str(i),
+                "text": doc.page_content,
+                "metadata": doc.metadata,
+                "vector": vector,
+            }
+            for i, (doc, vector) in enumerate(zip(docs, vectors))
+        ),
+        refresh=True,
+    )
+
+
+def open_backend(es_url: Optional[str], latency: float, index_name: str):
+    """측정 대상 Elasticsearch 주소, 문서, 로컬 서버(실제 노드면 None)를 반환합니다."""
+    docs = load_chunks()
+    embedding = DeterministicFakeEmbedding(size=VECTOR_DIMS)
+    if es_url:
+        seed_index(Elasticsearch(es_url), index_name, docs, embedding)
+        return es_url, docs, None
+    server = LocalElasticsearch(docs, latency=latency, embedding=embedding).start()
+    return server.url, docs, server
+
+
+def legacy_query(query: str, filter_clauses: List[dict], k: int) -> dict:
+    """filter 절을 쓰기 전의 질의 형식 (term 도 must 에서 점수 계산, 전체 _source, 전체 hit 수)."""
+    return {
+        "query": {"bool": {"must": filter_clauses + [{"match": {"text": query}}]}},
+        "size": k,
+    }
+
+
+def bench_msearch(es_url, latency, index_name, repeat, k):
+    """질의별 search 와 _msearch 한 번으로 검색하는 batch, 비동기 경로를 비교합니다."""
+    url, docs, server = open_backend(es_url, latency, index_name)
+    queries = QUESTIONS * repeat
+    client = Elasticsearch(url)
+    async_client = AsyncElasticsearch(url)
+    retriever = CustomElasticSearchBM25Retriever(
+        client=client, index_name=index_name, k=k, async_client=async_client
+    )
+    print(f"문서 {len(docs)}개, 질의 {len(queries)}개, 요청당 지연 {latency}초")
+    print(f"{'mode':<22} {'time':>9} {'requests':>9}")
+
+    def measure(name, func):
+        requests = server.requests if server else 0
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        count = server.requests - requests if server else "-"
+        print(f"{name:<22} {elapsed * 1000:>7.1f}ms {count:>9}")
+        return result
+
+    expected = measure("invoke x N", lambda: [retriever.invoke(q) for q in queries])
+    batched = measure("batch (_msearch)", lambda: retriever.batch(queries))
+    assert batched == expected, "batch 결과가 invoke 와 다릅니다."
+
+    async def run_async():
+        # AsyncElasticsearch 의 세션은 처음 사용한 이벤트 루프에 묶이므로 한 루프에서 측정합니다.
+        async def timed(name, coro_func):
+            requests = server.requests if server else 0
+            start = time.perf_counter()
+            result = await coro_func()
+            elapsed = time.perf_counter() - start
+            count = server.requests - requests if server else "-"
+            print(f"{name:<22} {elapsed * 1000:>7.1f}ms {count:>9}")
+            return result
+
+        gathered = await timed(
+            "ainvoke x N (gather)",
+            lambda: asyncio.gather(*(retriever.ainvoke(q) for q in queries)),
+        )
+        abatched = await timed("abatch (_msearch)", lambda: retriever.abatch(queries))
+        await async_client.close()
+        return gathered, abatched
+
+    gathered, abatched = asyncio.run(run_async())
+    assert gathered == expected and abatched == expected, "비동기 결과가 다릅니다."
+
+    if server:
+        server.stop()
+
+
+def bench_query(es_url, latency, index_name, repeat, k):
+    """이전 질의 형식과 filter 절, _source 제한, track_total_hits=false, request_cache 를 비교합니다.
+
+    로컬 대용 서버는 filter cache, request cache 를 흉내 내지 않으므로 응답 크기 차이만
+    반영됩니다. 캐시 효과는 --es-url 로 실제 노드에서 측정합니다.
+    """
+    url, docs, server = open_backend(es_url, latency, index_name)
+    client = Elasticsearch(url)
+    source = docs[0].metadata["source"]
+    search_kwargs = {"filter": {"source": source}}
+    retriever = CustomElasticSearchBM25Retriever(
+        client=client, index_name=index_name, filter=search_kwargs, k=k
+    )
+    cached_retriever = CustomElasticSearchBM25Retriever(
+        client=client,
+        index_name=index_name,
+        filter=search_kwargs,
+        k=k,
+        request_cache=True,
+    )
+    filter_clauses = retriever.build_filter_query()
+    queries = QUESTIONS * repeat
+    print(f"문서 {len(docs)}개, 질의 {len(queries)}개, 필터 source={source}")
+    print(f"{'mode':<22} {'p50':>8} {'p95':>8} {'bytes/resp':>11}")
+
+    def measure(name, search):
+        # 첫 회는 워밍업으로 제외합니다.
+        search(queries[0])
+        latencies, sizes, results = [], [], []
+        for query in queries:
+            start = time.perf_counter()
+            res = search(query)
+            latencies.append(time.perf_counter() - start)
+            sizes.append(len(json.dumps(res.body, ensure_ascii=False).encode()))
+            results.append(retriever.parse_hits(res))
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+        print(f"{name:<22} {p50:>6.1f}ms {p95:>6.1f}ms {int(np.mean(sizes)):>11}")
+        return results
+
+    expected = measure(
+        "legacy (must)",
+        lambda q: client.search(index=index_name, body=legacy_query(q, filter_clauses, k)),
+    )
+    optimized = measure(
+        "filter + _source",
+        lambda q: client.search(index=index_name, body=retriever.build_query(q)),
+    )
+    cached = measure(
+        "+ request_cache",
+        lambda q: client.search(
+            index=index_name,
+            body=cached_retriever.build_query(q),
+            **cached_retriever.search_params(),
+        ),
+    )
+    assert expected == optimized == cached, "검색 결과가 다릅니다."
+
+    if server:
+        server.stop()
+
+
+def recall_at_k(results: List[List[Document]], answers: List[str]) -> float:
+    """정답 문구가 들어 있는 청크를 하나라도 찾은 질문의 비율."""
+    found = [
+        any(answer in doc.page_content for doc in docs)
+        for docs, answer in zip(results, answers)
+    ]
+    return sum(found) / len(found)
+
+
+def bench_local(es_url, latency, index_name, repeat, k):
+    """Elasticsearch BM25 retriever 와 로컬 KiwiBM25Retriever 의 지연 시간, recall@k 를 비교합니다.
+
+    로컬 대용 서버의 BM25 는 공백 단위로 색인해서 Elasticsearch standard analyzer 와 비슷합니다.
+    """
+    url, docs, server = open_backend(es_url, latency, index_name)
+    questions = list(LABELED_QUESTIONS)
+    answers = list(LABELED_QUESTIONS.values())
+    es_retriever = CustomElasticSearchBM25Retriever(
+        client=Elasticsearch(url), index_name=index_name, k=k
+    )
+    with tempfile.TemporaryDirectory() as index_dir:
+        start = time.perf_counter()
+        KiwiBM25Retriever.build_index(docs, index_name, index_dir)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        KiwiBM25Retriever.build_index(docs, index_name, index_dir)
+        rebuild_time = time.perf_counter() - start
+        start = time.perf_counter()
+        local_retriever = KiwiBM25Retriever(index_name, k=k, index_dir=index_dir)
+        load_time = time.perf_counter() - start
+        print(
+            f"문서 {len(docs)}개, 질문 {len(questions)}개 x {repeat}회, k={k}\n"
+            f"로컬 인덱스 생성 {build_time:.2f}초, 캐시 재생성 {rebuild_time:.2f}초, "
+            f"로드 {load_time * 1000:.1f}ms"
+        )
+        print(f"{'retriever':<22} {'p50':>8} {'p95':>8} {'recall@k':>9}")
+
+        for name, retriever in [
+            ("elasticsearch", es_retriever),
+            ("kiwi bm25 (local)", local_retriever),
+        ]:
+            retriever.invoke(questions[0])
+            latencies = []
+            for _ in range(repeat):
+                for question in questions:
+                    start = time.perf_counter()
+                    retriever.invoke(question)
+                    latencies.append(time.perf_counter() - start)
+            recall = recall_at_k([retriever.invoke(q) for q in questions], answers)
+            p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+            print(f"{name:<22} {p50:>6.2f}ms {p95:>6.2f}ms {recall:>9.2f}")
+
+    if server:
+        server.stop()
+
+
+def estimate_bm25_pivot(client: Elasticsearch, index_name: str, queries, k: int) -> float:
+    """질의별 BM25 상위 k 개 점수의 중앙값. weighted hybrid 의 bm25_pivot 으로 사용합니다."""
+    scores = []
+    for query in queries:
+        res = client.search(index=index_name, query={"match": {"text": query}}, size=k)
+        scores.extend(hit["_score"] for hit in res["hits"]["hits"])
+    return float(np.median(scores)) if scores else 1.0
+
+
+def bench_hybrid(es_url, latency, index_name, repeat, k, embed_latency):
+    """BM25 + knn EnsembleRetriever 와 요청 한 번으로 검색하는 hybrid retriever 를 비교합니다."""
+    url, docs, server = open_backend(es_url, latency, index_name)
+    client = Elasticsearch(url)
+    embedding = LatencyEmbeddings(size=VECTOR_DIMS, latency=embed_latency)
+    bm25 = CustomElasticSearchBM25Retriever(client=client, index_name=index_name, k=k)
+    ensemble = EnsembleRetriever(
+        retrievers=[
+            bm25,
+            KnnRetriever(client=client, index_name=index_name, embedding=embedding, k=k),
+        ],
+        weights=[0.5, 0.5],
+    )
+    hybrid_rrf = CustomElasticSearchHybridRetriever(
+        client=client, index_name=index_name, embedding=embedding, k=k
+    )
+    pivot = estimate_bm25_pivot(client, index_name, QUESTIONS, k)
+    hybrid_weighted = CustomElasticSearchHybridRetriever(
+        client=client,
+        index_name=index_name,
+        embedding=embedding,
+        k=k,
+        fusion="weighted",
+        bm25_pivot=pivot,
+    )
+    queries = QUESTIONS * repeat
+    print(
+        f"문서 {len(docs)}개, 질의 {len(queries)}개, 요청당 지연 {latency}초, "
+        f"임베딩 지연 {embed_latency}초, weighted bm25_pivot {pivot:.2f}"
+    )
+    print(f"{'retriever':<22} {'p50':>8} {'p95':>8} {'req/query':>10}")
+
+    def measure(name, retriever):
+        retriever.invoke(queries[0])
+        requests = server.requests if server else 0
+        latencies, results = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results.append(retriever.invoke(query))
+            latencies.append(time.perf_counter() - start)
+        count = (server.requests - requests) / len(queries) if server else float("nan")
+        p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+        print(f"{name:<22} {p50:>6.1f}ms {p95:>6.1f}ms {count:>10.1f}")
+        return results
+
+    expected = measure("ensemble (bm25 + knn)", ensemble)
+    fused = {
+        "hybrid rrf": measure("hybrid rrf", hybrid_rrf),
+        "hybrid weighted": measure("hybrid weighted", hybrid_weighted),
+    }
+    bm25_only = [bm25.invoke(query) for query in queries]
+
+    # EnsembleRetriever 는 두 결과의 합집합(최대 2k 개)을 RRF 순으로 반환하고, 점수가 같으면
+    # 순서가 엔진마다 다르므로 hybrid 결과가 모두 ensemble 의 k 번째 점수 이상인지 확인합니다.
+    def rrf_scores(query):
+        scores = {}
+        for retriever in ensemble.retrievers:
+            for rank, doc in enumerate(retriever.invoke(query), start=1):
+                scores[doc.page_content] = scores.get(doc.page_content, 0) + 1 / (60 + rank)
+        return scores
+
+    def contents(docs):
+        return [doc.page_content for doc in docs]
+
+    print(f"{'retriever':<22} {'ensemble 일치율':>14} {'BM25 와 같은 비율':>16}")
+    for name, results in fused.items():
+        agreement = []
+        for query, ensemble_docs, hybrid_docs in zip(queries, expected, results):
+            scores = rrf_scores(query)
+            cutoff = scores[ensemble_docs[:k][-1].page_content]
+            agreement.append(
+                len(hybrid_docs) == min(k, len(ensemble_docs))
+                and all(scores.get(doc.page_content, 0) >= cutoff for doc in hybrid_docs)
+            )
+        # 상위 k 개가 BM25 단독 검색과 같으면 벡터 검색이 순위에 영향을 주지 못한 것입니다.
+        same_as_bm25 = [
+            contents(hybrid_docs) == contents(bm25_docs)
+            for hybrid_docs, bm25_docs in zip(results, bm25_only)
+        ]
+        print(f"{name:<22} {np.mean(agreement):>14.2f} {np.mean(same_as_bm25):>16.2f}")
+
+    if server:
+        server.stop()
+
+
+def add_backend_arguments(parser):
+    parser.add_argument("--es-url", default=None, help="실제 Elasticsearch 주소")
+    parser.add_argument("--index-name", default="bench_pdf")
+    parser.add_argument("--latency", type=float, default=0.02)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Elasticsearch retriever 벤치마크")
+    subparsers = parser.add_subparsers(dest="target", required=True)
+
+    msearch_parser = subparsers.add_parser("msearch", help="search 와 _msearch 비교")
+    add_backend_arguments(msearch_parser)
+    msearch_parser.add_argument("--repeat", type=int, default=2)
+    msearch_parser.add_argument("--k", type=int, default=3)
+
+    query_parser = subparsers.add_parser("query", help="질의 형식별 지연 시간 비교")
+    add_backend_arguments(query_parser)
+    query_parser.add_argument("--repeat", type=int, default=5)
+    query_parser.add_argument("--k", type=int, default=3)
+
+    local_parser = subparsers.add_parser("local", help="Elasticsearch 와 로컬 BM25 비교")
+    add_backend_arguments(local_parser)
+    local_parser.add_argument("--repeat", type=int, default=5)
+    local_parser.add_argument("--k", type=int, default=3)
+
+    hybrid_parser = subparsers.add_parser("hybrid", help="ensemble 과 hybrid 비교")
+    add_backend_arguments(hybrid_parser)
+    hybrid_parser.add_argument("--repeat", type=int, default=5)
+    hybrid_parser.add_argument("--k", type=int, default=3)
+    hybrid_parser.add_argument("--embed-latency", type=float, default=0.05)
+
+    args = parser.parse_args()
+    if args.target == "msearch":
+        bench_msearch(args.es_url, args.latency, args.index_name, args.repeat, args.k)
+    elif args.target == "query":
+        bench_query(args.es_url, args.latency, args.index_name, args.repeat, args.k)
+    elif args.target == "local":
+        bench_local(args.es_url, args.latency, args.index_name, args.repeat, args.k)
+    elif args.target == "hybrid":
+        bench_hybrid(
+            args.es_url,
+            args.latency,
+            args.index_name,
+            args.repeat,
+            args.k,
+            args.embed_latency,
+        )
@@ -0,0 +1,322 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from kiwipiepy import Kiwi
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from rank_bm25 import BM25Okapi
+
+logger = logging.getLogger(__name__)
+
+# 인덱스 파일 형식이 바뀌면 올립니다.
+INDEX_FORMAT_VERSION = 1
+DEFAULT_INDEX_DIR = ".cache/bm25"
+# 색인에 남길 형태소 품사 (체언, 용언 어간, 어근, 부사, 외국어/한자/숫자)
+CONTENT_TAGS = ("N", "VV", "VA", "XR", "MAG", "SL", "SH", "SN")
+# 메타데이터 필터 마스크를 기억할 최대 (key, value) 수
+MAX_METADATA_MASKS = 128
+
+
+@lru_cache(maxsize=None)
+def get_kiwi() -> Kiwi:
+    """형태소 분석기를 프로세스당 한 번만 불러옵니다 (약 1초)."""
+    return Kiwi()
+
+
+def index_path(index_dir: str, index_name: str) -> str:
+    return os.path.join(index_dir, f"{index_name}.json")
+
+
+def write_json(path: str, data) -> None:
+    """임시 파일에 쓴 뒤 교체해서 읽는 쪽이 중간 상태를 보지 않도록 합니다."""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class KiwiTokenizer:
+    """kiwipiepy 형태소 분석 결과에서 내용어만 남기는 토크나이저.
+
+    문서 청크의 분석 결과는 텍스트 해시를 키로 cache_path 에 저장해서, 인덱스를 다시 만들 때
+    바뀌지 않은 청크는 분석하지 않습니다. 질의는 캐시하지 않습니다.
+    """
+
+    def __init__(
+        self, cache_path: Optional[str] = None, tags: Sequence[str] = CONTENT_TAGS
+    ):
+        self.cache_path = cache_path
+        self.tags = tuple(tags)
+        self._cache: Dict[str, List[str]] = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, encoding="utf-8") as f:
+                self._cache = json.load(f)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _terms(self, tokens) -> List[str]:
+        return [token.form.lower() for token in tokens if token.tag.startswith(self.tags)]
+
+    def tokenize(self, text: str) -> List[str]:
+        return self._terms(get_kiwi().tokenize(text))
+
+    def tokenize_documents(self, texts: List[str]) -> List[List[str]]:
+        """청크 목록을 분석합니다. 캐시에 없는 청크만 한 번에 분석하고 캐시 파일을 갱신합니다."""
+        keys = [self.make_key(text) for text in texts]
+        missing = {key: text for key, text in zip(keys, texts) if key not in self._cache}
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+        if missing:
+            analyzed = get_kiwi().tokenize(list(missing.values()))
+            for key, tokens in zip(missing, analyzed):
+                self._cache[key] = self._terms(tokens)
+            if self.cache_path:
+                write_json(self.cache_path, self._cache)
+        return [self._cache[key] for key in keys]
+
+
+class KiwiBM25Index:
+    """형태소 단위 BM25 역색인 (term -> 문서 번호, 빈도).
+
+    idf 와 점수 식은 rank_bm25.BM25Okapi 와 같고, 질의 형태소가 있는 문서만 계산합니다.
+    """
+
+    def __init__(
+        self,
+        documents: List[Document],
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray]],
+        idf: Dict[str, float],
+        doc_len: np.ndarray,
+        avgdl: float,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.documents = documents
+        self.postings = postings
+        self.idf = idf
+        self.doc_len = doc_len
+        self.avgdl = avgdl
+        self.k1 = k1
+        self.b = b
+        # 문서 길이에 따른 정규화 항은 질의마다 같으므로 미리 계산합니다.
+        self._norm = k1 * (1 - b + b * doc_len / avgdl)
+        # 최근 사용한 필터 마스크 (LRU, 최대 MAX_METADATA_MASKS 개)
+        self._metadata_masks: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._masks_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def build(
+        cls,
+        documents: List[Document],
+        tokenizer: KiwiTokenizer,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ) -> "KiwiBM25Index":
+        if not documents:
+            raise ValueError("색인할 문서가 없습니다.")
+        corpus = tokenizer.tokenize_documents([doc.page_content for doc in documents])
+        bm25 = BM25Okapi(corpus, k1=k1, b=b, epsilon=epsilon)
+        postings: Dict[str, Tuple[list, list]] = {}
+        for doc_id, frequencies in enumerate(bm25.doc_freqs):
+            for term, tf in frequencies.items():
+                ids, tfs = postings.setdefault(term, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+        return cls(
+            documents,
+            {
+                term: (np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.float64))
+                for term, (ids, tfs) in postings.items()
+            },
+            bm25.idf,
+            np.array(bm25.doc_len, dtype=np.float64),
+            bm25.avgdl,
+            k1,
+            b,
+        )
+
+    def save(self, path: str) -> None:
+        write_json(
+            path,
+            {
+                "version": INDEX_FORMAT_VERSION,
+                "k1": self.k1,
+                "b": self.b,
+                "avgdl": self.avgdl,
+                "doc_len": self.doc_len.astype(int).tolist(),
+                "idf": self.idf,
+                "postings": {
+                    term: [ids.tolist(), tfs.astype(int).tolist()]
+                    for term, (ids, tfs) in self.postings.items()
+                },
+                "documents": [
+                    {"page_content": doc.page_content, "metadata": doc.metadata}
+                    for doc in self.documents
+                ],
+            },
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "KiwiBM25Index":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"인덱스 형식 버전이 다릅니다: {data.get('version')} (필요: {INDEX_FORMAT_VERSION}). "
+                "from_documents 로 다시 만드세요."
+            )
+        return cls(
+            [Document(**doc) for doc in data["documents"]],
+            {
+                term: (np.array(ids, dtype=np.int32), np.array(tfs, dtype=np.float64))
+                for term, (ids, tfs) in data["postings"].items()
+            },
+            data["idf"],
+            np.array(data["doc_len"], dtype=np.float64),
+            data["avgdl"],
+            data["k1"],
+            data["b"],
+        )
+
+    def metadata_mask(self, key: str, value) -> np.ndarray:
+        """metadata[key] 가 value 와 같은 문서 마스크. Elasticsearch term 필터처럼 문자열로 비교합니다."""
+        mask_key = (key, str(value))
+        with self._masks_lock:
+            mask = self._metadata_masks.get(mask_key)
+            if mask is not None:
+                self._metadata_masks.move_to_end(mask_key)
+                return mask
+        mask = np.array(
+            [str(doc.metadata.get(key)) == str(value) for doc in self.documents]
+        )
+        with self._masks_lock:
+            self._metadata_masks[mask_key] = mask
+            while len(self._metadata_masks) > MAX_METADATA_MASKS:
+                self._metadata_masks.popitem(last=False)
+        return mask
+
+    def search(
+        self, terms: List[str], k: int, filter: Optional[Dict[str, object]] = None
+    ) -> List[Tuple[int, float]]:
+        """상위 k 개의 (문서 번호, 점수) 를 반환합니다. 질의 형태소가 하나도 없는 문서는 제외합니다."""
+        scores = np.zeros(len(self.documents))
+        matched = np.zeros(len(self.documents), dtype=bool)
+        for term in terms:
+            if term not in self.postings:
+                continue
+            ids, tfs = self.postings[term]
+            scores[ids] += self.idf[term] * (
+                tfs * (self.k1 + 1) / (tfs + self._norm[ids])
+            )
+            matched[ids] = True
+        for key, value in (filter or {}).items():
+            matched &= self.metadata_mask(key, value)
+
+        candidates = np.flatnonzero(matched)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        # 점수가 같으면 먼저 색인한 문서가 앞에 옵니다.
+        candidates = sorted(candidates, key=lambda doc_id: (-scores[doc_id], doc_id))
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in candidates]
+
+
+class KiwiBM25Retriever(BaseRetriever):
+    """CustomElasticSearchBM25Retriever 와 같은 인자(index_name, filter, k)로 쓰는 로컬 BM25 retriever.
+
+    Elasticsearch 에 접속할 수 없는 환경에서 index_dir 에 저장한 형태소 역색인으로 검색합니다.
+    인덱스는 from_documents 로 만듭니다.
+    """
+
+    index_name: str
+    index_dir: str = DEFAULT_INDEX_DIR
+
+    def __init__(
+        self,
+        index_name: str,
+        filter: dict = {},
+        k: int = 4,
+        index_dir: str = DEFAULT_INDEX_DIR,
+    ) -> None:
+        super().__init__(index_name=index_name, index_dir=index_dir)
+        self._k = k
+        self._filter = filter
+        # 질의 분석에는 형태소 분석 캐시를 쓰지 않으므로 캐시 파일을 읽지 않습니다.
+        # 캐시는 build_index 에서만 불러옵니다.
+        self._tokenizer = KiwiTokenizer()
+        self._index = KiwiBM25Index.load(index_path(index_dir, index_name))
+
+    @classmethod
+    def build_index(
+        cls,
+        documents: List[Document],
+        index_name: str,
+        index_dir: str = DEFAULT_INDEX_DIR,
+        **kwargs,
+    ) -> KiwiBM25Index:
+        """문서로 인덱스를 만들어 index_dir 에 저장합니다. kwargs 는 k1, b, epsilon 입니다."""
+        tokenizer = KiwiTokenizer(os.path.join(index_dir, "tokens.json"))
+        index = KiwiBM25Index.build(documents, tokenizer, **kwargs)
+        index.save(index_path(index_dir, index_name))
+        logger.info(
+            f"BM25 인덱스 저장: {index_name} (문서 {len(index)}개, "
+            f"형태소 분석 캐시 {tokenizer.hits}/{len(documents)})"
+        )
+        return index
+
+    @classmethod
+    def from_documents(
+        cls,
+        documents: List[Document],
+        index_name: str,
+        filter: dict = {},
+        k: int = 4,
+        index_dir: str = DEFAULT_INDEX_DIR,
+        **kwargs,
+    ) -> "KiwiBM25Retriever":
+        cls.build_index(documents, index_name, index_dir, **kwargs)
+        return cls(index_name=index_name, filter=filter, k=k, index_dir=index_dir)
+
+    def add_documents(self, documents: List[Document]) -> None:
+        """문서를 추가하고 인덱스를 다시 만듭니다. 기존 청크는 형태소 분석 캐시를 사용합니다."""
+        self._index = self.build_index(
+            self._index.documents + documents,
+            self.index_name,
+            self.index_dir,
+            k1=self._index.k1,
+            b=self._index.b,
+        )
+
+    def build_filter_query(self) -> Dict[str, object]:
+        return dict(self._filter.get("filter") or {})
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        hits = self._index.search(
+            self._tokenizer.tokenize(query), self._k, self.build_filter_query()
+        )
+        return [
+            Document(
+                page_content=self._index.documents[doc_id].page_content,
+                metadata=dict(self._index.documents[doc_id].metadata),
+            )
+            for doc_id, _ in hits
+        ]